@@ -0,0 +1,220 @@
+#! /Users/msharp/.pyenv/versions/weekly-update/bin/python
+
+import typer
+import datetime as dt
+import logging
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from dotenv import load_dotenv
+from os import path
+from tempfile import TemporaryDirectory
+from time import time
+from typing import List, NamedTuple, Optional
+
+from data.aggregation import AggregationEngine
+from data.loading import load_opportunities
+from data.targets import (
+    DEFAULT_TEMPLATE,
+    load_config,
+    select_template,
+    targets_for_date,
+    to_decimal,
+)
+from data.date_values import ReportCalendar
+from data.template import compile_template
+from data.weekly_update import generate_weekly_update_dict
+
+from document_handler.document import parse_report
+from document_handler.writers import output_paths, write_outputs
+
+log = logging.getLogger(__name__)
+
+_CURRENT_DIRECTORY = path.dirname(path.realpath(__file__))
+
+_engine: AggregationEngine | None = None
+
+
+class ReportJob(NamedTuple):
+    date: dt.date
+    template_name: str
+    management_call: Decimal
+    quarterly_booking_target: Decimal
+    monthly_pipe_target: Decimal
+
+
+def _init_worker(data: pd.DataFrame | str) -> None:
+    """
+    Builds one AggregationEngine per process, shared by every report it renders\n
+    <data> may be a write_frame file path, which is memory-mapped so that worker
+    processes share one copy of the data instead of each unpickling their own.
+    """
+    global _engine
+    if isinstance(data, str):
+        from data.arrow_frame import read_frame
+
+        data = read_frame(data)
+    _engine = AggregationEngine(data)
+
+
+def render_job(job: ReportJob) -> tuple[str, dict]:
+    """
+    Returns the rendered report for <job> and the metric values it was rendered from
+    """
+    template = compile_template(
+        path.join(_CURRENT_DIRECTORY, "templates", job.template_name)
+    )
+    template_data = generate_weekly_update_dict(
+        data=_engine.data,
+        management_call=job.management_call,
+        monthly_pipe_target=job.monthly_pipe_target,
+        quarterly_booking_target=job.quarterly_booking_target,
+        for_date=job.date,
+        engine=_engine,
+        fields=template.fields,
+    )
+    return template.render(template_data), template_data
+
+
+def report_dates(
+    dates: list[str], start_date: str | None, end_date: str | None, step_days: int
+) -> list[dt.date]:
+    """
+    Returns the sorted, de-duplicated report dates from <dates> and the
+    <start_date>..<end_date> range taken every <step_days> days\n
+    Raises typer.BadParameter for an <end_date> without a <start_date>.
+    """
+    if end_date and not start_date:
+        raise typer.BadParameter("--end-date needs a --start-date")
+
+    report_dates = {dt.date.fromisoformat(date) for date in dates}
+
+    if start_date:
+        current = dt.date.fromisoformat(start_date)
+        last = dt.date.fromisoformat(end_date) if end_date else dt.date.today()
+        while current <= last:
+            report_dates.add(current)
+            current += dt.timedelta(days=step_days)
+
+    return sorted(report_dates)
+
+
+def batch(
+    date: Optional[List[str]] = typer.Option(None),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    step_days: int = 7,
+    template: Optional[List[str]] = typer.Option(None),
+    config: str = "config.toml",
+    management_call: Optional[float] = None,
+    quarterly_target: Optional[float] = None,
+    monthly_pipe_target: Optional[float] = None,
+    workers: int = 1,
+    save_to_docx: bool = True,
+    verbose: bool = False,
+    debug: bool = False,
+    use_snapshot: bool = False,
+    offline: bool = False,
+    output_format: Optional[List[str]] = typer.Option(None),
+    input_path: Optional[str] = typer.Option(None, "--input"),
+):
+    """
+    Generates weekly updates for many dates and templates from a single data pull.\n
+    Dates are given with --date (repeatable) and/or --start-date/--end-date every --step-days.\n
+    Every date is rendered with every --template (default: default.txt), using --workers processes.\n
+    Dates without a management call use the template's no-management-call variant.\n
+    --input reads the opportunities from a CSV or Parquet export instead of Salesforce.\n
+    --output-format (repeatable: docx, md, html, json) adds output formats, written concurrently per report.\n
+    Targets for each date come from the --config TOML file unless overridden on the command line.\n
+    """
+
+    logging.basicConfig(
+        level=logging.INFO,
+        datefmt="%H:%M:%S",
+        format="%(asctime)s %(levelname)s: %(message)s",
+    )
+
+    if debug:
+        log.setLevel(logging.DEBUG)
+
+    log.info("Started")
+    start = time()
+
+    load_dotenv(path.join(_CURRENT_DIRECTORY, ".env"), encoding="utf-8", override=True)
+
+    dates = report_dates(date or [], start_date, end_date, step_days)
+    if not dates:
+        raise typer.BadParameter("Supply at least one --date or a --start-date")
+
+    report_config = load_config(path.join(_CURRENT_DIRECTORY, config))
+    jobs = []
+    for report_date in dates:
+        targets = targets_for_date(
+            config=report_config,
+            date=report_date,
+            management_call=to_decimal(management_call),
+            quarterly_booking_target=to_decimal(quarterly_target),
+            monthly_pipe_target=to_decimal(monthly_pipe_target),
+        ).with_defaults()
+
+        for template_name in template or [DEFAULT_TEMPLATE]:
+            report_management_call, template_name = select_template(
+                targets.management_call, template_name
+            )
+            jobs.append(
+                ReportJob(
+                    date=report_date,
+                    template_name=template_name,
+                    management_call=report_management_call,
+                    quarterly_booking_target=targets.quarterly_booking_target,
+                    monthly_pipe_target=targets.monthly_pipe_target,
+                )
+            )
+    log.info("Rendering {} reports for {} dates".format(len(jobs), len(dates)))
+
+    min_date = ReportCalendar.for_date(dates[0]).cq_minus(4).start_date()
+    data = load_opportunities(
+        min_date=min_date.isoformat(),
+        current_directory=_CURRENT_DIRECTORY,
+        use_snapshot=use_snapshot,
+        offline=offline,
+        input_path=input_path,
+    )
+
+    if workers > 1:
+        # pyarrow is only needed to share the frame between worker processes
+        from data.arrow_frame import write_frame
+
+        with TemporaryDirectory() as frame_directory:
+            frame_path = write_frame(data, path.join(frame_directory, "data.arrow"))
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(frame_path,)
+            ) as executor:
+                reports = list(executor.map(render_job, jobs))
+    else:
+        _init_worker(data)
+        reports = [render_job(job) for job in jobs]
+
+    formats = (["docx"] if save_to_docx else []) + (output_format or [])
+    formats = list(dict.fromkeys(formats))
+    for job, (weekly_update, template_data) in zip(jobs, reports):
+        if verbose:
+            print(weekly_update)
+
+        if formats:
+            title = "{}_{}".format(
+                job.date.strftime("%d%b%y"), path.splitext(job.template_name)[0]
+            )
+            for output in write_outputs(
+                parse_report(weekly_update, title=title),
+                template_data,
+                output_paths(formats, "Weekly_Update_{}".format(title)),
+            ).values():
+                print("\n\nSummary file saved to {}\n\n".format(path.abspath(output)))
+
+    log.info("Completed {} reports in {}s".format(len(jobs), round(time() - start, 2)))
+
+
+if __name__ == "__main__":
+    typer.run(batch)
@@ -0,0 +1,383 @@
+import typer
+import contextlib
+import datetime as dt
+import io
+import json
+import logging
+import numpy as np
+import pandas as pd
+import platform
+import statistics
+
+from decimal import Decimal
+from os import makedirs, path
+from time import perf_counter
+from typing import Callable, List, Optional
+
+from data.aggregation import AggregationEngine
+from data.date_values import ReportCalendar
+from data.metrics import MetricReport, metric_definitions
+from data.template import compile_template
+from data.transformations import (
+    SALESFORCE_FIELDS,
+    Category,
+    Metric,
+    bookings_by_comms_vs_identity,
+    bookings_by_region,
+    bulk_csv_to_dataframe,
+    pipeline_by_comms_vs_identity,
+    pipeline_by_forecast,
+    pipeline_by_region,
+    salesforce_batches_to_dataframe,
+    salesforce_dict_to_dataframe,
+    top_best_case_in_period,
+    top_business_terms_in_period,
+    top_commits_in_period,
+    top_n_opps_by,
+    top_opps_in_period,
+    total_in_period,
+)
+from data.weekly_update import generate_weekly_update_dict
+from instrumentation import TRACER
+
+from .synthetic import AS_OF, synthetic_records
+
+log = logging.getLogger(__name__)
+
+_TEMPLATE_PATH = path.join(
+    path.dirname(path.dirname(path.realpath(__file__))), "templates", "default.txt"
+)
+MANAGEMENT_CALL = Decimal(2_000_000)
+MONTHLY_PIPE_TARGET = Decimal(861_326)
+QUARTERLY_BOOKING_TARGET = Decimal(1_100_000)
+
+# name: setup(context) -> the callable to time. Setup runs once per size, untimed.
+BENCHMARKS: dict[str, Callable[[dict], Callable[[], object]]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    """
+    Decorator that registers a benchmark setup function under <name>
+    """
+
+    def decorator(setup: Callable) -> Callable:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+def build_context(rows: int) -> dict:
+    """
+    Generates <rows> synthetic records and the standardized frame every benchmark reads
+    """
+    records = synthetic_records(rows)
+    data = salesforce_dict_to_dataframe(records)
+    calendar = ReportCalendar.for_date(AS_OF)
+    return {"rows": rows, "records": records, "data": data, "calendar": calendar}
+
+
+# Ingest
+
+
+@benchmark("ingest.salesforce_dict")
+def _ingest_dict(context: dict):
+    records = context["records"]
+    return lambda: salesforce_dict_to_dataframe(records)
+
+
+@benchmark("ingest.salesforce_batches")
+def _ingest_batches(context: dict):
+    records = context["records"]["records"]
+    batches = [records[start : start + 2_000] for start in range(0, len(records), 2_000)]
+    return lambda: salesforce_batches_to_dataframe(batches)
+
+
+@benchmark("ingest.bulk_csv")
+def _ingest_bulk_csv(context: dict):
+    chunk = pd.DataFrame(context["records"]["records"])[list(SALESFORCE_FIELDS)].to_csv(
+        index=False
+    )
+    return lambda: bulk_csv_to_dataframe([chunk])
+
+
+# Aggregation functions, as called by the pre-engine report
+
+
+def _total(category: Category, metric: Metric):
+    def setup(context: dict):
+        data, window = context["data"], context["calendar"].cq
+        return lambda: total_in_period(data, category, metric, *window)
+
+    return setup
+
+
+for _category in Category:
+    for _metric in Metric:
+        benchmark(f"aggregation.total_in_period.{_category.name}.{_metric.name}")(
+            _total(_category, _metric)
+        )
+
+
+def _top(category: Category):
+    def setup(context: dict):
+        data, window = context["data"], context["calendar"].cq
+        return lambda: top_opps_in_period(data, category, *window)
+
+    return setup
+
+
+for _category in Category:
+    benchmark(f"aggregation.top_opps_in_period.{_category.name}")(_top(_category))
+
+
+def _windowed(function: Callable, window: str, **kwargs):
+    def setup(context: dict):
+        data, (start_date, end_date) = context["data"], context["calendar"].window(window)
+        return lambda: function(
+            data=data, start_date=start_date, end_date=end_date, **kwargs
+        )
+
+    return setup
+
+
+benchmark("aggregation.top_commits_in_period")(_windowed(top_commits_in_period, "cm"))
+benchmark("aggregation.top_best_case_in_period")(_windowed(top_best_case_in_period, "cq"))
+benchmark("aggregation.top_business_terms_in_period")(
+    _windowed(top_business_terms_in_period, "cq")
+)
+benchmark("aggregation.bookings_by_region")(_windowed(bookings_by_region, "ytd"))
+benchmark("aggregation.bookings_by_comms_vs_identity")(
+    _windowed(bookings_by_comms_vs_identity, "ytd")
+)
+benchmark("aggregation.pipeline_by_forecast")(
+    _windowed(pipeline_by_forecast, "cq", management_call=MANAGEMENT_CALL)
+)
+benchmark("aggregation.pipeline_by_comms_vs_identity")(
+    _windowed(pipeline_by_comms_vs_identity, "cq_to_date")
+)
+benchmark("aggregation.pipeline_by_region")(_windowed(pipeline_by_region, "cq_to_date"))
+
+
+@benchmark("aggregation.top_n_opps_by")
+def _top_n_opps_by(context: dict):
+    data = context["data"]
+    return lambda: top_n_opps_by(data, "FORECAST_CATEGORY")
+
+
+# Engine and full report
+
+
+def _report(context: dict, engine: AggregationEngine) -> MetricReport:
+    return MetricReport(
+        engine=engine,
+        calendar=context["calendar"],
+        management_call=MANAGEMENT_CALL,
+        monthly_pipe_target=MONTHLY_PIPE_TARGET,
+        quarterly_booking_target=QUARTERLY_BOOKING_TARGET,
+    )
+
+
+@benchmark("engine.prepare_and_run")
+def _engine(context: dict):
+    def run():
+        report = _report(context, AggregationEngine(context["data"]))
+        requests = report.plan(metric_definitions())
+        return report.engine.run(requests)
+
+    return run
+
+
+@benchmark("report.generate_weekly_update_dict")
+def _report_cold(context: dict):
+    data, calendar = context["data"], context["calendar"]
+    return lambda: generate_weekly_update_dict(
+        data=data,
+        management_call=MANAGEMENT_CALL,
+        monthly_pipe_target=MONTHLY_PIPE_TARGET,
+        quarterly_booking_target=QUARTERLY_BOOKING_TARGET,
+        for_date=AS_OF,
+        calendar=calendar,
+    )
+
+
+@benchmark("report.shared_engine")
+def _report_warm(context: dict):
+    engine = AggregationEngine(context["data"])
+    return lambda: _report(context, engine).evaluate()
+
+
+@benchmark("report.template")
+def _report_template(context: dict):
+    data, calendar = context["data"], context["calendar"]
+
+    def run():
+        template = compile_template(_TEMPLATE_PATH)
+        return template.render(
+            generate_weekly_update_dict(
+                data=data,
+                management_call=MANAGEMENT_CALL,
+                monthly_pipe_target=MONTHLY_PIPE_TARGET,
+                quarterly_booking_target=QUARTERLY_BOOKING_TARGET,
+                for_date=AS_OF,
+                calendar=calendar,
+                fields=template.fields,
+            )
+        )
+
+    return run
+
+
+def time_function(
+    function: Callable, repeat: int, min_sample_time: float = 0.01
+) -> list[float]:
+    """
+    Returns <repeat> samples of the seconds per call of <function>.\n
+    Fast functions are looped so each sample lasts at least <min_sample_time>.
+    """
+    function()
+    number = 1
+    while True:
+        start = perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = perf_counter() - start
+        if elapsed >= min_sample_time or number >= 10_000:
+            break
+        number *= 10
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((perf_counter() - start) / number)
+    return samples
+
+
+def run_benchmarks(sizes: list[int], repeat: int, selected: list[str]) -> dict:
+    """
+    Times every benchmark whose name starts with one of <selected> (all if empty) at
+    each row count in <sizes>. Returns {"<name>[<rows>]": {"min", "median", ...}}.
+    """
+    names = [
+        name
+        for name in BENCHMARKS
+        if not selected or any(name.startswith(prefix) for prefix in selected)
+    ]
+    results = {}
+    for rows in sizes:
+        log.info("Generating {} synthetic opportunities".format(rows))
+        context = build_context(rows)
+        for name in names:
+            function = BENCHMARKS[name](context)
+            # calculate_gap_coverage prints its inputs on every call
+            with contextlib.redirect_stdout(io.StringIO()):
+                samples = time_function(function, repeat)
+            TRACER.spans.clear()
+            results[f"{name}[{rows}]"] = {
+                "rows": rows,
+                "min": min(samples),
+                "median": statistics.median(samples),
+                "samples": samples,
+            }
+            log.info(
+                "{}[{}]: {}ms".format(name, rows, round(min(samples) * 1000, 3))
+            )
+    return results
+
+
+def environment() -> dict:
+    return {
+        "date": dt.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Returns one line per benchmark in both runs with its min time relative to
+    <baseline>, marking changes beyond <threshold> (e.g. 0.1 = 10%)
+    """
+    lines = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        if ratio > 1 + threshold:
+            marker = "SLOWER"
+        elif ratio < 1 - threshold:
+            marker = "faster"
+        else:
+            marker = ""
+        lines.append(
+            "{:<70} {:>10.3f}ms {:>10.3f}ms {:>6.2f}x {}".format(
+                name, baseline[name]["min"] * 1000, result["min"] * 1000, ratio, marker
+            )
+        )
+    return lines
+
+
+def main(
+    size: Optional[List[int]] = typer.Option(None),
+    repeat: int = 5,
+    only: Optional[List[str]] = typer.Option(None),
+    save: Optional[str] = None,
+    compare_to: Optional[str] = None,
+    threshold: float = 0.1,
+    list_benchmarks: bool = False,
+):
+    """
+    Times ingest, the aggregation functions and report generation on synthetic data.\n
+    --size (repeatable) sets the row counts, default 1000, 10000 and 100000; 1000000 is supported.\n
+    --only (repeatable) runs benchmarks whose names start with the prefix, e.g. --only aggregation.\n
+    --save writes the results to a JSON baseline; --compare-to prints the change against one
+    and exits with status 1 if any benchmark is slower by more than --threshold.
+    Baselines are machine-specific, so record and compare them on the same machine.\n
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        datefmt="%H:%M:%S",
+        format="%(asctime)s %(levelname)s: %(message)s",
+    )
+    if list_benchmarks:
+        print("\n".join(BENCHMARKS))
+        return
+
+    results = run_benchmarks(size or [1_000, 10_000, 100_000], repeat, only or [])
+
+    if save:
+        makedirs(path.dirname(path.abspath(save)), exist_ok=True)
+        with open(save, mode="wt") as baseline_file:
+            json.dump(
+                {"environment": environment(), "results": results},
+                baseline_file,
+                indent=1,
+            )
+        log.info("Baseline saved to {}".format(path.abspath(save)))
+
+    if compare_to:
+        with open(compare_to, mode="rt") as baseline_file:
+            baseline = json.load(baseline_file)
+        lines = compare(results, baseline["results"], threshold)
+        print(
+            "\nBaseline from {} (python {}, pandas {})\n".format(
+                baseline["environment"]["date"],
+                baseline["environment"]["python"],
+                baseline["environment"]["pandas"],
+            )
+        )
+        print(
+            "{:<70} {:>12} {:>12} {:>7}".format("benchmark", "baseline", "current", "ratio")
+        )
+        print("\n".join(lines))
+        if any(line.endswith("SLOWER") for line in lines):
+            raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
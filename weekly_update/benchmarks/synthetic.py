@@ -0,0 +1,148 @@
+import datetime as dt
+import numpy as np
+
+from typing import Iterator
+
+from data.transformations import CLOSED_STAGES
+from datequarter import DateQuarter as dq
+
+# Report date the generated data is centred on, fixed so benchmark baselines compare
+AS_OF = dt.date(2024, 5, 20)
+
+# StageName: (share of opportunities, ForecastCategoryName)
+STAGES = {
+    "Prospecting": (0.14, "Pipeline"),
+    "Qualification": (0.12, "Pipeline"),
+    "Discovery": (0.08, "Pipeline"),
+    "Proposal": (0.08, "Best Case"),
+    "Business Terms": (0.05, "Commit"),
+    "Negotiation": (0.05, "Commit"),
+    "Closed-Won": (0.20, "Closed"),
+    "Closed-Lost": (0.28, "Omitted"),
+}
+REGIONS = {"North America": 0.45, "EMEA": 0.25, "APAC": 0.18, "LATAM": 0.12}
+COMMS_VS_IDENTITY = {
+    "Communications": 0.45,
+    "Identity": 0.30,
+    "Bundle": 0.15,
+    "Services": 0.07,
+    None: 0.03,
+}
+# Share of open opportunities parked in the "Ommitted" forecast category
+OMITTED_SHARE = 0.04
+# Share of opportunities never given an SAO date
+NO_SAO_SHARE = 0.15
+HISTORY_DAYS = 730
+
+
+def _choice(generator: np.random.Generator, weights: dict, rows: int) -> np.ndarray:
+    values = np.empty(len(weights), dtype=object)
+    values[:] = list(weights)
+    probabilities = np.fromiter(weights.values(), dtype="float64")
+    codes = generator.choice(len(values), size=rows, p=probabilities / probabilities.sum())
+    return values[codes]
+
+
+def _close_days(
+    generator: np.random.Generator, created: np.ndarray, closed: np.ndarray, as_of: dt.date
+) -> np.ndarray:
+    """
+    Close dates as day offsets from <as_of>.\n
+    Closed deals close 0-1 years after creation and no later than <as_of>. Open deals
+    bunch up towards the end of this or one of the next two quarters, with some
+    left overdue.
+    """
+    rows = created.shape[0]
+    days = np.minimum(created + generator.gamma(2.0, 45.0, size=rows).astype("int64"), 0)
+
+    quarter = dq.from_date(as_of)
+    quarter_ends = np.array(
+        [((quarter + n).end_date() - as_of).days for n in range(3)], dtype="int64"
+    )
+    open_days = quarter_ends[generator.choice(3, size=rows, p=[0.5, 0.3, 0.2])]
+    open_days -= generator.exponential(25.0, size=rows).astype("int64")
+    open_days = np.maximum(open_days, np.maximum(created, -45))
+
+    return np.where(closed, days, open_days)
+
+
+def _iso_dates(as_of: dt.date, days: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(np.datetime64(as_of, "D") + days, unit="D")
+
+
+def synthetic_records(
+    rows: int, as_of: dt.date = AS_OF, seed: int = 0
+) -> dict:
+    """
+    Returns <rows> random Opportunity records shaped like a Salesforce query_all
+    response for SALESFORCE_QUERY, dated around <as_of>.\n
+    Stages, forecast categories, regions and products follow fixed shares (STAGES,
+    REGIONS, COMMS_VS_IDENTITY); DM is log-normal. The same <rows>, <as_of> and
+    <seed> always give the same records.
+    """
+    generator = np.random.default_rng(seed)
+
+    stage_names = np.array(list(STAGES), dtype=object)
+    shares = np.array([share for share, _ in STAGES.values()])
+    stage_codes = generator.choice(len(STAGES), size=rows, p=shares / shares.sum())
+    stages = stage_names[stage_codes]
+    forecasts = np.array([forecast for _, forecast in STAGES.values()], dtype=object)[
+        stage_codes
+    ]
+    closed = np.isin(stage_codes, [list(STAGES).index(stage) for stage in CLOSED_STAGES])
+    forecasts[~closed & (generator.random(rows) < OMITTED_SHARE)] = "Ommitted"
+
+    created = -generator.integers(0, HISTORY_DAYS, size=rows)
+    created_at = np.datetime64(as_of, "s") + (
+        created * 86_400 + generator.integers(0, 86_400, size=rows)
+    )
+    sao = np.where(
+        generator.random(rows) < NO_SAO_SHARE,
+        None,
+        _iso_dates(as_of, np.minimum(created + generator.geometric(0.08, size=rows), 0)),
+    )
+    close = _iso_dates(as_of, _close_days(generator, created, closed, as_of))
+
+    dm = np.round(generator.lognormal(np.log(15_000), 1.2, size=rows), 2)
+    dm[generator.random(rows) < 0.02] = 0.0
+
+    records = [
+        {
+            "attributes": {"type": "Opportunity"},
+            "Name": f"Opp {index}",
+            "StageName": stage,
+            "ForecastCategoryName": forecast,
+            "Comms_vs_Identity__c": product,
+            "Sales_Team_Region__c": region,
+            "CloseDate": close_date,
+            "Amount_Direct_Margin__c": amount,
+            "CreatedDate": f"{created_date}.000+0000",
+            "SAO_Date__c": sao_date,
+        }
+        for index, (
+            stage, forecast, product, region, close_date, amount, created_date, sao_date
+        ) in enumerate(
+            zip(
+                stages,
+                forecasts,
+                _choice(generator, COMMS_VS_IDENTITY, rows),
+                _choice(generator, REGIONS, rows),
+                close,
+                dm.tolist(),
+                np.datetime_as_string(created_at, unit="s"),
+                sao,
+            )
+        )
+    ]
+    return {"totalSize": rows, "done": True, "records": records}
+
+
+def synthetic_batches(
+    rows: int, batch_size: int = 2_000, as_of: dt.date = AS_OF, seed: int = 0
+) -> Iterator[list[dict]]:
+    """
+    Yields synthetic_records in pages of <batch_size>, like query.iter_salesforce_query
+    """
+    records = synthetic_records(rows, as_of, seed)["records"]
+    for start in range(0, rows, batch_size):
+        yield records[start : start + batch_size]
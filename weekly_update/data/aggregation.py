@@ -0,0 +1,314 @@
+import datetime as dt
+import logging
+import numpy as np
+import pandas as pd
+
+from decimal import Decimal
+from typing import Iterable, NamedTuple
+
+from datequarter import DateQuarter as dq
+
+from .cube import CUBE_DIMENSIONS, SplitCube
+from .transformations import (
+    Category,
+    DateIndex,
+    Metric,
+    _as_decimal,
+    _top_n_opps,
+    split_by,
+    sum_dm,
+)
+
+log = logging.getLogger(__name__)
+
+
+class Total(NamedTuple):
+    category: Category
+    metric: Metric
+    start_date: dt.date
+    end_date: dt.date
+
+
+class Split(NamedTuple):
+    category: Category
+    field: str
+    start_date: dt.date
+    end_date: dt.date
+
+
+class Top(NamedTuple):
+    category: Category
+    start_date: dt.date
+    end_date: dt.date
+    number: int = 3
+
+
+class QuarterSeries(NamedTuple):
+    category: Category
+    metric: Metric
+    start_quarter: dq
+    end_quarter: dq
+
+
+def _date_field(category: Category) -> str:
+    if category == Category.STAGE_1:
+        return "STAGE_1_DATE"
+    return "CLOSEDATE"
+
+
+class AggregationEngine:
+    """
+    Evaluates report metric requests (Total, Split, Top) against one DataFrame.\n
+    Each distinct (Category, start_date, end_date) subset is filtered once and shared
+    by every request that needs it, no matter how many template fields ask for it.
+    Splits on CUBE_DIMENSIONS are answered from one SplitCube per prepare() call, and
+    every QuarterSeries on the same date field from one grouped pass over quarter codes.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self._data = data
+        self._value_masks: dict[tuple[str, str], np.ndarray] = {}
+        self._category_masks: dict[Category, np.ndarray] = {}
+        self._date_indexes: dict[str, DateIndex] = {}
+        self._positions: dict[tuple[Category, dt.date, dt.date], np.ndarray] = {}
+        self._subsets: dict[tuple[Category, dt.date, dt.date], pd.DataFrame] = {}
+        self._cubes: dict[tuple[Category, dt.date, dt.date], SplitCube] = {}
+        self._quarter_codes: dict[str, np.ndarray] = {}
+        self._series: dict[QuarterSeries, dict[dq, Decimal | int]] = {}
+
+    @property
+    def data(self) -> pd.DataFrame:
+        return self._data
+
+    def value_mask(self, field: str, value: str) -> np.ndarray:
+        """
+        Returns a cached boolean mask of rows where <field> == <value>.\n
+        Categorical columns are compared by integer code rather than by string.
+        """
+        key = (field, value)
+        if key not in self._value_masks:
+            column = self._data[field]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                if value in column.cat.categories:
+                    code = column.cat.categories.get_loc(value)
+                    mask = column.cat.codes.to_numpy() == code
+                else:
+                    mask = np.zeros(self._data.shape[0], dtype=bool)
+            else:
+                mask = (column == value).to_numpy()
+            self._value_masks[key] = mask
+        return self._value_masks[key]
+
+    def _category_mask(self, category: Category) -> np.ndarray:
+        if category not in self._category_masks:
+            match category:
+                case Category.STAGE_1 | Category.CLOSING:
+                    mask = np.ones(self._data.shape[0], dtype=bool)
+                case Category.PIPELINE:
+                    mask = ~(
+                        self.value_mask("FORECAST_CATEGORY", "Ommitted")
+                        | self.value_mask("FORECAST_CATEGORY", "Won")
+                    )
+                case Category.BOOKED:
+                    mask = self.value_mask("FORECAST_CATEGORY", "Won")
+                case Category.COMMIT:
+                    mask = self.value_mask("FORECAST_CATEGORY", "Commit")
+                case Category.BEST_CASE:
+                    mask = self.value_mask("FORECAST_CATEGORY", "Best Case")
+                case Category.BUSINESS_TERMS:
+                    mask = self.value_mask("STAGENAME", "Business Terms")
+            self._category_masks[category] = mask
+        return self._category_masks[category]
+
+    def date_index(self, field: str) -> DateIndex:
+        if field not in self._date_indexes:
+            self._date_indexes[field] = DateIndex(self._data[field])
+        return self._date_indexes[field]
+
+    def quarter_codes(self, field: str) -> np.ndarray:
+        """
+        Returns the cached quarter code of every row's <field>, see DateQuarter.from_dates
+        """
+        if field not in self._quarter_codes:
+            self._quarter_codes[field] = dq.from_dates(self._data[field])
+        return self._quarter_codes[field]
+
+    def _build_series(self, requests: list[QuarterSeries]) -> None:
+        """
+        Computes DM and count by quarter for every category in <requests>,
+        in one grouped pass per date field
+        """
+        by_field: dict[str, list[QuarterSeries]] = {}
+        for request in requests:
+            by_field.setdefault(_date_field(request.category), []).append(request)
+
+        for field, field_requests in by_field.items():
+            categories = list(dict.fromkeys(request.category for request in field_requests))
+            first = min(request.start_quarter.code() for request in field_requests)
+            last = max(request.end_quarter.code() for request in field_requests)
+            quarters = last - first + 1
+
+            codes = self.quarter_codes(field)
+            in_range = (codes >= first) & (codes <= last)
+            keys, dm = [], []
+            for n, category in enumerate(categories):
+                rows = np.flatnonzero(in_range & self._category_mask(category))
+                keys.append(n * quarters + codes[rows] - first)
+                dm.append(self._data["DM"].to_numpy()[rows])
+            keys = np.concatenate(keys)
+            dm = np.concatenate(dm)
+
+            dm_sums = np.zeros(len(categories) * quarters, dtype=dm.dtype)
+            np.add.at(dm_sums, keys, dm)
+            counts = np.bincount(keys, minlength=len(categories) * quarters)
+
+            for request in field_requests:
+                offset = categories.index(request.category) * quarters - first
+                series = {}
+                for quarter in dq.between(
+                    request.start_quarter, request.end_quarter, include_last=True
+                ):
+                    match request.metric:
+                        case Metric.DM:
+                            series[quarter] = _as_decimal(
+                                dm_sums[offset + quarter.code()]
+                            )
+                        case Metric.COUNT:
+                            series[quarter] = int(counts[offset + quarter.code()])
+                self._series[request] = series
+
+    def _cube_split(self, request) -> bool:
+        return (
+            isinstance(request, Split)
+            and request.field in CUBE_DIMENSIONS
+            and pd.api.types.is_integer_dtype(self._data["DM"])
+        )
+
+    def prepare(self, requests: Iterable[Total | Split | Top | QuarterSeries]) -> None:
+        """
+        Builds every subset needed by <requests>, computing each category mask
+        and each sorted date index only once.\n
+        Splits on CUBE_DIMENSIONS share one SplitCube over all of their windows.
+        """
+        requests = list(requests)
+        keys = {
+            (request.category, request.start_date, request.end_date)
+            for request in requests
+            if not self._cube_split(request) and not isinstance(request, QuarterSeries)
+        }
+        for key in keys - self._subsets.keys():
+            self.subset(*key)
+
+        windows = {
+            (request.category, request.start_date, request.end_date)
+            for request in requests
+            if self._cube_split(request)
+        }
+        if windows - self._cubes.keys():
+            cube = SplitCube(
+                self._data, {window: self.positions(*window) for window in windows}
+            )
+            self._cubes.update(dict.fromkeys(windows, cube))
+
+        series = [
+            request
+            for request in requests
+            if isinstance(request, QuarterSeries) and request not in self._series
+        ]
+        if series:
+            self._build_series(series)
+
+        log.debug(
+            "Prepared {} subsets from {} date indexes".format(
+                len(self._subsets), len(self._date_indexes)
+            )
+        )
+
+    def positions(
+        self, category: Category, start_date: dt.date, end_date: dt.date
+    ) -> np.ndarray:
+        """
+        Returns sorted row positions of <category> in period, filtering only on first use
+        """
+        key = (category, start_date, end_date)
+        if key not in self._positions:
+            positions = self.date_index(_date_field(category)).positions(
+                start_date, end_date
+            )
+            self._positions[key] = np.sort(
+                positions[self._category_mask(category)[positions]]
+            )
+        return self._positions[key]
+
+    def subset(
+        self, category: Category, start_date: dt.date, end_date: dt.date
+    ) -> pd.DataFrame:
+        """
+        Returns rows of <category> in period, filtering only on first use
+        """
+        key = (category, start_date, end_date)
+        if key not in self._subsets:
+            self._subsets[key] = self._data.take(self.positions(*key))
+        return self._subsets[key]
+
+    def total(self, request: Total):
+        category_data = self.subset(
+            request.category, request.start_date, request.end_date
+        )
+        match request.metric:
+            case Metric.DM:
+                return sum_dm(category_data)
+            case Metric.COUNT:
+                return category_data["NAME"].count()
+
+    def split(self, request: Split) -> dict:
+        window = (request.category, request.start_date, request.end_date)
+        if window in self._cubes and self._cube_split(request):
+            return self._cubes[window].split(window, request.field)
+
+        category_data = self.subset(
+            request.category, request.start_date, request.end_date
+        )
+        return split_by(data=category_data, field=request.field)
+
+    def top(self, request: Top, exclude: list = []) -> list:
+        category_data = self.subset(
+            request.category, request.start_date, request.end_date
+        )
+        if exclude:
+            opps_to_exclude = [opp for opp, _ in exclude]
+            category_data = category_data[~category_data["NAME"].isin(opps_to_exclude)]
+        return _top_n_opps(data=category_data, number=request.number)
+
+    def series(self, request: QuarterSeries) -> dict[dq, Decimal | int]:
+        """
+        Returns <request.metric> for each quarter from start_quarter to end_quarter
+        inclusive, keyed by DateQuarter in order
+        """
+        if request not in self._series:
+            self._build_series([request])
+        return self._series[request]
+
+    def run(self, requests: Iterable[Total | Split | Top | QuarterSeries]) -> dict:
+        """
+        Evaluates all <requests>, returning a dictionary keyed by request.\n
+        Duplicate requests are computed once.
+        """
+        requests = list(dict.fromkeys(requests))
+        self.prepare(requests)
+
+        return {request: self.evaluate(request) for request in requests}
+
+    def evaluate(self, request: Total | Split | Top | QuarterSeries):
+        """
+        Evaluates a single request, using any subsets built by prepare()
+        """
+        match request:
+            case Total():
+                return self.total(request)
+            case Split():
+                return self.split(request)
+            case Top():
+                return self.top(request)
+            case QuarterSeries():
+                return self.series(request)
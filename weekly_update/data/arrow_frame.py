@@ -0,0 +1,69 @@
+import logging
+import pandas as pd
+import pyarrow as pa
+
+from os import path
+
+from instrumentation import span
+
+from .transformations import REPORT_FIELDS
+
+log = logging.getLogger(__name__)
+
+FRAME_EXTENSIONS = (".arrow", ".feather")
+FRAME_METADATA_KEY = b"weekly_update.frame"
+FRAME_VERSION = b"1"
+
+
+def is_frame_file(file_path: str) -> bool:
+    return path.splitext(file_path)[1].lower() in FRAME_EXTENSIONS
+
+
+def write_frame(data: pd.DataFrame, file_path: str) -> str:
+    """
+    Writes the standardized opportunity DataFrame to <file_path> as an uncompressed
+    Arrow IPC (Feather v2) file, which read_frame can memory-map.\n
+    DM is kept as int64 cents, dates as timestamps and categoricals as dictionaries.
+    """
+    with span("frame.write") as write_span:
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), FRAME_METADATA_KEY: FRAME_VERSION}
+        )
+        with pa.OSFile(file_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        write_span.rows = table.num_rows
+
+    log.debug("Wrote {} rows to {}".format(table.num_rows, file_path))
+    return file_path
+
+
+def read_frame(file_path: str, memory_map: bool = True) -> pd.DataFrame:
+    """
+    Reads a write_frame file back into the standardized DataFrame.\n
+    With <memory_map> (default) the file is mapped rather than read, and columns
+    without nulls (DM, most dates) are used in place as read-only arrays, so
+    processes reading the same file share its pages. Raises ValueError for Arrow
+    files not written by write_frame.
+    """
+    with span("frame.read") as read_span:
+        source = pa.memory_map(file_path) if memory_map else pa.OSFile(file_path)
+        with source:
+            table = pa.ipc.open_file(source).read_all()
+
+        if (table.schema.metadata or {}).get(FRAME_METADATA_KEY) != FRAME_VERSION:
+            raise ValueError(
+                "{} is not a weekly update frame file (version {})".format(
+                    file_path, FRAME_VERSION.decode()
+                )
+            )
+        missing = set(REPORT_FIELDS) - set(table.column_names)
+        if missing:
+            raise ValueError(
+                "{} is missing columns {}".format(file_path, ", ".join(sorted(missing)))
+            )
+
+        data = table.to_pandas(split_blocks=True)
+        read_span.rows = data.shape[0]
+    return data
@@ -0,0 +1,187 @@
+import datetime as dt
+import logging
+import numpy as np
+
+from calendar import monthrange
+from functools import cache
+from typing import Callable, Iterable
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CALENDAR = "weekdays"
+
+HolidayRule = Callable[[int], Iterable[dt.date]]
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> dt.date:
+    """
+    Returns the <n>th <weekday> (Monday = 0) of a month. n = -1 is the last one
+    """
+    if n > 0:
+        first = dt.date(year, month, 1)
+        return first + dt.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = dt.date(year, month, monthrange(year, month)[1])
+    return last - dt.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> dt.date:
+    """
+    Returns Easter Sunday for a Gregorian year (anonymous Gregorian algorithm)
+    """
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month, day = divmod(h + l - 7 * m + 90, 25)
+    return dt.date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+
+def _nearest_weekday(date: dt.date) -> dt.date:
+    """
+    US observance: Saturday holidays move to Friday, Sunday holidays to Monday
+    """
+    match date.weekday():
+        case 5:
+            return date - dt.timedelta(days=1)
+        case 6:
+            return date + dt.timedelta(days=1)
+    return date
+
+
+def _us_federal(year: int) -> list[dt.date]:
+    holidays = [
+        _nearest_weekday(dt.date(year, 1, 1)),
+        _nth_weekday(year, 1, 0, 3),
+        _nth_weekday(year, 2, 0, 3),
+        _nth_weekday(year, 5, 0, -1),
+        _nearest_weekday(dt.date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),
+        _nth_weekday(year, 10, 0, 2),
+        _nearest_weekday(dt.date(year, 11, 11)),
+        _nth_weekday(year, 11, 3, 4),
+        _nearest_weekday(dt.date(year, 12, 25)),
+    ]
+    if year >= 2021:
+        holidays.append(_nearest_weekday(dt.date(year, 6, 19)))
+    return holidays
+
+
+def _uk_england(year: int) -> list[dt.date]:
+    easter = _easter(year)
+    holidays = [
+        easter - dt.timedelta(days=2),
+        easter + dt.timedelta(days=1),
+        _nth_weekday(year, 5, 0, 1),
+        _nth_weekday(year, 5, 0, -1),
+        _nth_weekday(year, 8, 0, -1),
+    ]
+    # Weekend fixed-date holidays are substituted by the next free weekday
+    for date in (dt.date(year, 1, 1), dt.date(year, 12, 25), dt.date(year, 12, 26)):
+        while date.weekday() >= 5 or date in holidays:
+            date += dt.timedelta(days=1)
+        holidays.append(date)
+    return holidays
+
+
+class BusinessCalendar:
+    """
+    Working days given by <weekmask> (numpy busday format) minus holidays.\n
+    <rules> return the observed holidays for a year; <holidays> adds fixed dates
+    such as company shutdown days. Holidays are generated per year on first use.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rules: Iterable[HolidayRule] = (),
+        holidays: Iterable[dt.date] = (),
+        weekmask: str = "1111100",
+    ):
+        self.name = name
+        self.weekmask = weekmask
+        self._rules = tuple(rules)
+        self._extra_holidays = sorted(holidays)
+
+    def __repr__(self):
+        return f"<BusinessCalendar-{self.name}>"
+
+    @cache
+    def holidays(self, year: int) -> tuple[dt.date, ...]:
+        """
+        Returns the sorted holidays that fall in <year>, including those observed
+        in <year> for a neighbouring year (e.g. a Saturday New Year's Day)
+        """
+        holidays = {
+            date
+            for rule_year in (year - 1, year, year + 1)
+            for rule in self._rules
+            for date in rule(rule_year)
+        }
+        holidays.update(date for date in self._extra_holidays if date.year == year)
+        return tuple(sorted(date for date in holidays if date.year == year))
+
+    @cache
+    def _busdaycalendar(self, first_year: int, last_year: int) -> np.busdaycalendar:
+        holidays = [
+            date for year in range(first_year, last_year + 1) for date in self.holidays(year)
+        ]
+        return np.busdaycalendar(
+            weekmask=self.weekmask, holidays=np.array(holidays, dtype="datetime64[D]")
+        )
+
+    def count(self, start_date: dt.date, end_date: dt.date) -> int:
+        """
+        Returns the number of business days from <start_date> to <end_date>, inclusive
+        of both. Returns 0 when <end_date> is before <start_date>
+        """
+        if end_date < start_date:
+            return 0
+        return int(
+            np.busday_count(
+                np.datetime64(start_date, "D"),
+                np.datetime64(end_date, "D") + 1,
+                busdaycal=self._busdaycalendar(start_date.year, end_date.year),
+            )
+        )
+
+
+CALENDARS: dict[str, BusinessCalendar] = {
+    "weekdays": BusinessCalendar("weekdays"),
+    "us": BusinessCalendar("us", rules=[_us_federal]),
+    "uk": BusinessCalendar("uk", rules=[_uk_england]),
+}
+
+
+def register_calendar(business_calendar: BusinessCalendar) -> None:
+    """
+    Makes <business_calendar> available by name to business_days()
+    """
+    CALENDARS[business_calendar.name] = business_calendar
+    business_days.cache_clear()
+
+
+def get_calendar(name: str) -> BusinessCalendar:
+    try:
+        return CALENDARS[name]
+    except KeyError:
+        raise KeyError(
+            "Unknown business day calendar '{}', expected one of {}".format(
+                name, ", ".join(CALENDARS)
+            )
+        ) from None
+
+
+@cache
+def business_days(
+    start_date: dt.date, end_date: dt.date, calendar: str = DEFAULT_CALENDAR
+) -> int:
+    """
+    Returns the number of business days in <calendar> from <start_date> to
+    <end_date> inclusive. Spans may cross months, quarters and years.\n
+    Results are cached per (start_date, end_date, calendar).
+    """
+    return get_calendar(calendar).count(start_date, end_date)
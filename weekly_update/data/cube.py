@@ -0,0 +1,127 @@
+import datetime as dt
+import logging
+import numpy as np
+import pandas as pd
+
+from decimal import Decimal
+from typing import Hashable, Sequence
+
+from .formatting import cents_to_decimal
+from .transformations import DM_FIELD
+
+log = logging.getLogger(__name__)
+
+CUBE_DIMENSIONS = ("REGION", "COMMS_VS_IDENTITY")
+
+_MISSING = object()
+
+Window = tuple[Hashable, dt.date, dt.date]
+
+
+class SplitCube:
+    """
+    DM sums over window x <dimensions>, built in one grouped pass.\n
+    <windows> maps each window key to the row positions in <data> that fall in it.
+    Windows may overlap, so rows are repeated once per window before grouping.
+    Missing dimension values are kept in their own slot, so they count towards
+    totals and other rollups but never appear as a value themselves.
+    DM must be stored as int64 cents (see standardize_data).
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        windows: dict[Window, np.ndarray],
+        dimensions: Sequence[str] = CUBE_DIMENSIONS,
+    ):
+        self._dimensions = tuple(dimensions)
+        self._windows = {window: n for n, window in enumerate(windows)}
+        self._values = {}
+
+        positions = np.concatenate(
+            [np.asarray(rows, dtype=np.intp) for rows in windows.values()]
+            or [np.empty(0, dtype=np.intp)]
+        )
+        key = np.repeat(
+            np.arange(len(windows), dtype=np.int64),
+            [len(rows) for rows in windows.values()],
+        )
+        for field in self._dimensions:
+            column = data[field]
+            if not isinstance(column.dtype, pd.CategoricalDtype):
+                column = column.astype("category")
+            self._values[field] = [*column.cat.categories, _MISSING]
+            codes = column.cat.codes.to_numpy()[positions].astype(np.int64)
+            codes[codes < 0] = len(self._values[field]) - 1
+            key = key * len(self._values[field]) + codes
+
+        shape = (len(windows), *(len(self._values[field]) for field in self._dimensions))
+        dm = data[DM_FIELD].to_numpy()[positions].astype(np.int64)
+
+        size = int(np.prod(shape))
+        self._dm = np.zeros(size, dtype=np.int64)
+        np.add.at(self._dm, key, dm)
+        self._dm = self._dm.reshape(shape)
+        self._count = np.bincount(key, minlength=size).reshape(shape)
+
+        log.debug(
+            "Built {} cube over {} windows from {} rows".format(
+                "x".join(str(n) for n in shape[1:]), len(windows), len(key)
+            )
+        )
+
+    def __contains__(self, window: Window) -> bool:
+        return window in self._windows
+
+    @property
+    def dimensions(self) -> tuple[str, ...]:
+        return self._dimensions
+
+    def _select(self, array: np.ndarray, window: Window, filters: dict) -> np.ndarray:
+        array = array[self._windows[window]]
+        for axis, field in enumerate(self._dimensions):
+            if field in filters:
+                keep = [value == filters[field] for value in self._values[field]]
+                array = np.compress(keep, array, axis=axis)
+        return array
+
+    def rollup(self, window: Window, field: str, **filters: str) -> dict[str, Decimal]:
+        """
+        Returns DM by <field> within <window>, summed over the other dimensions.\n
+        Keyword <filters> slice the cube first, e.g.
+        rollup(window, "REGION", COMMS_VS_IDENTITY="Identity").
+        Values with no rows in the slice are left out.
+        """
+        other_axes = tuple(
+            axis for axis, dimension in enumerate(self._dimensions) if dimension != field
+        )
+        dm = self._select(self._dm, window, filters).sum(axis=other_axes)
+        count = self._select(self._count, window, filters).sum(axis=other_axes)
+        values = [
+            value
+            for value in self._values[field]
+            if field not in filters or value == filters[field]
+        ]
+        return {
+            value: cents_to_decimal(dm[n])
+            for n, value in enumerate(values)
+            if count[n] and value is not _MISSING
+        }
+
+    def total(self, window: Window, **filters: str) -> Decimal:
+        """
+        Returns total DM within <window>, optionally sliced by <filters>
+        """
+        return cents_to_decimal(self._select(self._dm, window, filters).sum())
+
+    def split(self, window: Window, field: str, **filters: str) -> dict:
+        """
+        Returns DM by <field> in the same shape as split_by: each value's share
+        of the total under "PERCENT" and the overall sum under ["DM"]["Total"]
+        """
+        dm_by_field = self.rollup(window, field, **filters)
+        total = sum(dm_by_field.values(), cents_to_decimal(0))
+        return {
+            "DM": {**dm_by_field, "Total": total},
+            "PERCENT": {value: dm / total for value, dm in dm_by_field.items()},
+        }
@@ -1,61 +1,180 @@
 import datetime as dt
 
+from .business_days import DEFAULT_CALENDAR, business_days
 from .formatting import _d_round, fmt_percentage
 from datequarter import DateQuarter as dq
 from decimal import Decimal
+from functools import cache, cached_property
+from typing import NamedTuple
+
+
+class Window(NamedTuple):
+    start_date: dt.date
+    end_date: dt.date
 
-def _calcualte_business_days(month_start_date: dt.date, end_date: dt.date) -> dict:
-    """
-    Gets the number of business days in a given month.
-    """
 
-    business_days = 0
-    for day in range(month_start_date.day, end_date.day+1):
-        date = dt.date(month_start_date.year, month_start_date.month, day)
-        if date.weekday() < 5:
-            business_days += 1
-    return business_days
+def _business_days_percent(elapsed: int, total: int) -> Decimal:
+    try:
+        return _d_round(Decimal(elapsed / total), 6)
+    except ZeroDivisionError:
+        return Decimal(0)
 
-def generate_date_inputs(date: dt.date) -> dict[str:dict]:
+
+class ReportCalendar:
     """
-    Returns dictionary of DateTime dates and DateQuarter quarters for use in query and tranformation inputs
+    Report windows and pacing values for one report date.\n
+    Every value is computed on first access and cached. Use ReportCalendar.for_date
+    to share one instance per (date, calendar) across callers and batch runs.\n
+    Business days are counted with the named holiday <calendar>, see data.business_days
     """
 
-    cq = dq.from_date(date)
+    def __init__(self, date: dt.date, calendar: str = DEFAULT_CALENDAR):
+        self.date = date
+        self.calendar = calendar
 
-    cm_start_date = date.replace(day=1)
-    cm_end_date = (date.replace(day=28) + dt.timedelta(days=4)).replace(day=1)- dt.timedelta(days=1)
+    def __repr__(self):
+        return f"<ReportCalendar-{self.date.isoformat()}-{self.calendar}>"
 
-    total_business_days = _calcualte_business_days(cm_start_date,cm_end_date)
-    mtd_business_days = _calcualte_business_days(cm_start_date,date)
+    @classmethod
+    @cache
+    def for_date(cls, date: dt.date, calendar: str = DEFAULT_CALENDAR) -> "ReportCalendar":
+        return cls(date, calendar)
 
-    try:
-        mtd_business_days_percent = _d_round(Decimal(mtd_business_days / total_business_days),6)
-    except ZeroDivisionError:
-        mtd_business_days = Decimal(0)
-    
-    return {
-        "date": {
-            "cw_start_date": date - dt.timedelta(days=date.weekday() + 1),
-            "cw_end_date": date + dt.timedelta(days=(6 - date.weekday()) - 1),
-            "cm_start_date": cm_start_date,
-            "cm_end_date": cm_end_date,
-            "cm_name": date.strftime("%B"),
-            "cq_start_date": cq.start_date(),
-            "cq_end_date": cq.end_date(),
-            "cy_start_date": date.replace(month=1, day=1),
-            "cy_end_date": date.replace(month=12, day=31),
-        },
-        "month": {
-            "total_business_days": total_business_days,
-            "mtd_business_days": mtd_business_days,
-            "mtd_business_days_percent": mtd_business_days_percent
-        },
-        "quarter": {
-            "cq": cq,
-            "cq_minus_1": cq - 1,
-            "cq_minus_2": cq - 2,
-            "cq_minus_3": cq - 3,
-            "cq_minus_4": cq - 4,
-        },
-    }
\ No newline at end of file
+    @cached_property
+    def cw(self) -> Window:
+        """
+        Current week, Sunday to Saturday
+        """
+        return Window(
+            self.date - dt.timedelta(days=self.date.weekday() + 1),
+            self.date + dt.timedelta(days=(6 - self.date.weekday()) - 1),
+        )
+
+    @cached_property
+    def cm(self) -> Window:
+        next_month = (self.date.replace(day=28) + dt.timedelta(days=4)).replace(day=1)
+        return Window(self.date.replace(day=1), next_month - dt.timedelta(days=1))
+
+    @cached_property
+    def cm_name(self) -> str:
+        return self.date.strftime("%B")
+
+    @cached_property
+    def cq_quarter(self) -> dq:
+        return dq.from_date(self.date)
+
+    @cached_property
+    def cq(self) -> Window:
+        return Window(self.cq_quarter.start_date(), self.cq_quarter.end_date())
+
+    @cached_property
+    def cq_to_date(self) -> Window:
+        return Window(self.cq.start_date, self.date)
+
+    @cached_property
+    def cy(self) -> Window:
+        return Window(
+            self.date.replace(month=1, day=1), self.date.replace(month=12, day=31)
+        )
+
+    @cached_property
+    def ytd(self) -> Window:
+        return Window(self.cy.start_date, self.date)
+
+    def cq_minus(self, quarters: int) -> dq:
+        """
+        Returns the quarter <quarters> before the current quarter
+        """
+        return self.cq_quarter - quarters
+
+    def trailing_quarters(self, quarters: int) -> list[dq]:
+        """
+        Returns the <quarters> quarters before the current quarter, oldest first
+        """
+        return list(dq.between(self.cq_minus(quarters), self.cq_quarter))
+
+    def window(self, name: str) -> Window:
+        """
+        Returns a window by name: cw, cm, cq, cq_to_date, cy, ytd, cq_minus_<n>
+        (a single prior quarter) or trailing_<n>q (the <n> quarters before this one)
+        """
+        if name.startswith("cq_minus_"):
+            quarter = self.cq_minus(int(name.removeprefix("cq_minus_")))
+            return Window(quarter.start_date(), quarter.end_date())
+        if name.startswith("trailing_") and name.endswith("q"):
+            quarters = int(name.removeprefix("trailing_").removesuffix("q"))
+            return Window(
+                self.cq_minus(quarters).start_date(), self.cq_minus(1).end_date()
+            )
+        if name in ("cw", "cm", "cq", "cq_to_date", "cy", "ytd"):
+            return getattr(self, name)
+        raise KeyError("Unknown report window '{}'".format(name))
+
+    @cached_property
+    def month_of_quarter(self) -> int:
+        """
+        Number of full months of the quarter before the current month
+        """
+        return self.cm.start_date.month - self.cq.start_date.month
+
+    @cached_property
+    def cm_business_days(self) -> int:
+        return business_days(*self.cm, self.calendar)
+
+    @cached_property
+    def mtd_business_days(self) -> int:
+        return business_days(self.cm.start_date, self.date, self.calendar)
+
+    @cached_property
+    def mtd_business_days_percent(self) -> Decimal:
+        return _business_days_percent(self.mtd_business_days, self.cm_business_days)
+
+    @cached_property
+    def cq_business_days(self) -> int:
+        return business_days(*self.cq, self.calendar)
+
+    @cached_property
+    def qtd_business_days(self) -> int:
+        return business_days(self.cq.start_date, self.date, self.calendar)
+
+    @cached_property
+    def qtd_business_days_percent(self) -> Decimal:
+        return _business_days_percent(self.qtd_business_days, self.cq_business_days)
+
+    def as_dict(self) -> dict[str:dict]:
+        """
+        Returns the values in the generate_date_inputs dictionary layout
+        """
+        return {
+            "date": {
+                "cw_start_date": self.cw.start_date,
+                "cw_end_date": self.cw.end_date,
+                "cm_start_date": self.cm.start_date,
+                "cm_end_date": self.cm.end_date,
+                "cm_name": self.cm_name,
+                "cq_start_date": self.cq.start_date,
+                "cq_end_date": self.cq.end_date,
+                "cy_start_date": self.cy.start_date,
+                "cy_end_date": self.cy.end_date,
+            },
+            "month": {
+                "total_business_days": self.cm_business_days,
+                "mtd_business_days": self.mtd_business_days,
+                "mtd_business_days_percent": self.mtd_business_days_percent,
+            },
+            "quarter": {
+                "cq": self.cq_quarter,
+                "cq_minus_1": self.cq_minus(1),
+                "cq_minus_2": self.cq_minus(2),
+                "cq_minus_3": self.cq_minus(3),
+                "cq_minus_4": self.cq_minus(4),
+            },
+        }
+
+
+def generate_date_inputs(date: dt.date, calendar: str = DEFAULT_CALENDAR) -> dict[str:dict]:
+    """
+    Returns dictionary of DateTime dates and DateQuarter quarters for use in query and tranformation inputs\n
+    See ReportCalendar, which computes only the values that are used
+    """
+    return ReportCalendar.for_date(date, calendar).as_dict()
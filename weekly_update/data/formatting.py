@@ -1,5 +1,12 @@
 from decimal import Decimal
 
+def cents_to_decimal(cents: int) -> Decimal:
+    """
+    Converts an integer number of cents (as stored in a numeric DM column) to a 2dp Decimal
+    """
+    return Decimal(int(cents)).scaleb(-2)
+
+
 def _d_round(num: Decimal, places: int):
     return num.quantize(Decimal(f"1.{'0'*places}"), rounding="ROUND_HALF_UP")
 
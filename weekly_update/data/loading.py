@@ -0,0 +1,67 @@
+import logging
+import pandas as pd
+
+from os import path
+
+from instrumentation import span
+
+from .query import SALESFORCE_QUERY, fetch_opportunities
+from .snapshot import OpportunitySnapshot, sync_snapshot
+from .transformations import load_from_file
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "opportunity_snapshot.sqlite3"
+
+
+def load_opportunities(
+    min_date: str,
+    current_directory: str,
+    use_snapshot: bool = False,
+    offline: bool = False,
+    input_path: str | None = None,
+) -> pd.DataFrame:
+    """
+    Returns the standardized opportunity DataFrame from <input_path> (a CSV, Parquet
+    or write_frame Arrow file) if given, otherwise from Salesforce or the local snapshot
+    in <current_directory>
+    """
+    with span("load") as load_span:
+        data = _load_opportunities(
+            min_date, current_directory, use_snapshot, offline, input_path
+        )
+        load_span.rows = data.shape[0]
+    return data
+
+
+def _load_opportunities(
+    min_date: str,
+    current_directory: str,
+    use_snapshot: bool,
+    offline: bool,
+    input_path: str | None,
+) -> pd.DataFrame:
+    if input_path:
+        # pyarrow is only needed for file inputs, so it is imported here
+        from .arrow_frame import is_frame_file, read_frame
+
+        log.info("Loading opportunities from {}".format(input_path))
+        if is_frame_file(input_path):
+            return read_frame(input_path)
+        return load_from_file(input_path)
+
+    snapshot_path = path.join(current_directory, SNAPSHOT_FILE)
+
+    if offline:
+        log.info("Loading opportunities from snapshot {}".format(snapshot_path))
+        with OpportunitySnapshot(snapshot_path) as snapshot:
+            return snapshot.to_dataframe()
+
+    if use_snapshot:
+        with OpportunitySnapshot(snapshot_path) as snapshot:
+            return sync_snapshot(snapshot=snapshot, min_date=min_date)
+
+    salesforce_query = SALESFORCE_QUERY.substitute(
+        {"MIN_DATE": min_date, "MIN_DATETIME": f"{min_date}T00:00:00.000Z"}
+    )
+    return fetch_opportunities(query=salesforce_query)
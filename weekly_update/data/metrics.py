@@ -0,0 +1,331 @@
+import logging
+import re
+
+from decimal import Decimal
+from functools import cache, cached_property
+from typing import Any, Callable, Iterable, NamedTuple
+
+from datequarter import DateQuarter as dq
+from instrumentation import span
+
+from .aggregation import AggregationEngine, QuarterSeries, Split, Top, Total
+from .date_values import ReportCalendar
+from .formatting import fmt_currency, fmt_percentage
+from .transformations import Category, Metric, add_gap_coverage
+
+log = logging.getLogger(__name__)
+
+QUARTER = "QUARTER"
+TOP = "TOP"
+DEFAULT_TOP_N = 3
+
+
+class MetricDefinition(NamedTuple):
+    """
+    One template field.\n
+    category, metric and window (a ReportCalendar.window name) select the data.
+    group decides the request: None for a Total, a column name for a Split, QUARTER
+    for a QuarterSeries over the window and TOP for the top opportunities.
+    formatter(result, report) returns the field value, or None to leave the field out.
+    A definition with no category only uses the report's calendar and targets.
+    """
+
+    category: Category | None
+    metric: Metric | None
+    window: str | None
+    group: str | None
+    formatter: Callable[[Any, "MetricReport"], Any]
+
+
+def _static(value: Callable[["MetricReport"], Any]) -> MetricDefinition:
+    return MetricDefinition(None, None, None, None, lambda _, report: value(report))
+
+
+def _currency(places: int = 1) -> Callable:
+    return lambda dm, _: fmt_currency(dm, places)
+
+
+def _count(count, _):
+    return count
+
+
+def _split_dm(key: str) -> Callable:
+    return lambda split, _: fmt_currency(split["DM"][key], 1)
+
+
+def _split_percent(key: str, places: int = 0) -> Callable:
+    return lambda split, _: fmt_percentage(split["PERCENT"][key], places)
+
+
+def _rest_of_world_percent(split: dict, _) -> str:
+    return fmt_percentage(
+        sum(split["PERCENT"].values()) - split["PERCENT"]["North America"], places=0
+    )
+
+
+def _quarter_dm(quarters_back: int) -> Callable:
+    return lambda series, report: fmt_currency(
+        series[report.calendar.cq_minus(quarters_back)], 1
+    )
+
+
+def _top_opp(n: int) -> Callable:
+    return lambda opps, _: _fmt_opp(opps[n])
+
+
+def _fmt_opp(opp: tuple) -> str:
+    name, dm = opp
+    return f"{name} - {fmt_currency(dm,1)}"
+
+
+def _qtd_pipeline_attainment(cq_created_dm: Decimal, report: "MetricReport") -> str:
+    calendar = report.calendar
+    target = report.monthly_pipe_target
+    try:
+        return fmt_percentage(cq_created_dm / (target*calendar.month_of_quarter+target*calendar.mtd_business_days_percent))
+    except ZeroDivisionError:
+        return fmt_percentage(Decimal(0))
+
+
+def _gap(key: str, formatter: Callable = lambda value: value) -> Callable:
+    def format_gap(_, report: "MetricReport"):
+        if report.gap_coverage is None:
+            return None
+        return formatter(report.gap_coverage[key])
+
+    return format_gap
+
+
+_BOOKED = (Category.BOOKED, Metric.DM)
+_CREATED = (Category.STAGE_1, Metric.DM)
+_CLOSING = (Category.CLOSING, Metric.DM)
+
+METRICS: dict[str, MetricDefinition] = {
+    "week_end_date_long": _static(lambda report: report.calendar.cw.end_date.strftime("%B %d")),
+    "current_month": _static(lambda report: report.calendar.cm_name),
+    "cq_number": _static(lambda report: report.calendar.cq_quarter.quarter()),
+    "mgmt_call": _static(lambda report: fmt_currency(report.management_call, 0)),
+    "dm_target": _static(lambda report: fmt_currency(report.quarterly_booking_target, 1)),
+    # Bookings
+    "cq_na_booked_percent": MetricDefinition(*_BOOKED, "cq_to_date", "REGION", _split_percent("North America")),
+    "cq_row_booked_percent": MetricDefinition(*_BOOKED, "cq_to_date", "REGION", _rest_of_world_percent),
+    "cq_na_booked_dm": MetricDefinition(*_BOOKED, "cq_to_date", "REGION", _split_dm("North America")),
+    "cq_latam_booked_dm": MetricDefinition(*_BOOKED, "cq_to_date", "REGION", _split_dm("LATAM")),
+    "cq_emea_booked_dm": MetricDefinition(*_BOOKED, "cq_to_date", "REGION", _split_dm("EMEA")),
+    "cq_apac_booked_dm": MetricDefinition(*_BOOKED, "cq_to_date", "REGION", _split_dm("APAC")),
+    "cq_comms_booked_percent": MetricDefinition(*_BOOKED, "cq_to_date", "COMMS_VS_IDENTITY", _split_percent("Communications")),
+    "cq_di_booked_percent": MetricDefinition(*_BOOKED, "cq_to_date", "COMMS_VS_IDENTITY", _split_percent("Identity")),
+    "cq_bundle_booked_percent": MetricDefinition(*_BOOKED, "cq_to_date", "COMMS_VS_IDENTITY", _split_percent("Bundle")),
+    "cq_services_booked_percent": MetricDefinition(*_BOOKED, "cq_to_date", "COMMS_VS_IDENTITY", _split_percent("Services")),
+    "ytd_bookings": MetricDefinition(*_BOOKED, "ytd", "REGION", _split_dm("Total")),
+    "ytd_na_bookings_percent": MetricDefinition(*_BOOKED, "ytd", "REGION", _split_percent("North America")),
+    "ytd_row_bookings_percent": MetricDefinition(*_BOOKED, "ytd", "REGION", _rest_of_world_percent),
+    "ytd_comms_bookings_percent": MetricDefinition(*_BOOKED, "ytd", "COMMS_VS_IDENTITY", _split_percent("Communications")),
+    "ytd_di_bookings_percent": MetricDefinition(*_BOOKED, "ytd", "COMMS_VS_IDENTITY", _split_percent("Identity")),
+    "ytd_bundle_bookings_percent": MetricDefinition(*_BOOKED, "ytd", "COMMS_VS_IDENTITY", _split_percent("Bundle")),
+    "ytd_tsp_bookings_percent": MetricDefinition(*_BOOKED, "ytd", "COMMS_VS_IDENTITY", _split_percent("Services")),
+    "cw_booked_opps": MetricDefinition(Category.BOOKED, Metric.COUNT, "cw", None, _count),
+    "cw_booked_dm": MetricDefinition(*_BOOKED, "cw", None, _currency()),
+    # Forecast
+    "cq_commit_dm": MetricDefinition(*_CLOSING, "cq", "FORECAST_CATEGORY", _split_dm("Commit")),
+    "cq_best_case_dm": MetricDefinition(*_CLOSING, "cq", "FORECAST_CATEGORY", _split_dm("Best Case")),
+    "cq_pipeline_dm": MetricDefinition(*_CLOSING, "cq", "FORECAST_CATEGORY", _split_dm("Pipeline")),
+    "cq_booked_dm": MetricDefinition(*_CLOSING, "cq", "FORECAST_CATEGORY", _split_dm("Won")),
+    "gap_dm": MetricDefinition(*_CLOSING, "cq", "FORECAST_CATEGORY", _gap("DM Gap", lambda gap: fmt_currency(gap, 1))),
+    "gap_coverage": MetricDefinition(*_CLOSING, "cq", "FORECAST_CATEGORY", _gap("Coverage")),
+    # Pipeline generation
+    "cw_stage_1_opps": MetricDefinition(Category.STAGE_1, Metric.COUNT, "cw", None, _count),
+    "cw_stage_1_opp_dm": MetricDefinition(*_CREATED, "cw", None, _currency()),
+    "cq_stage_1_opps": MetricDefinition(Category.STAGE_1, Metric.COUNT, "cq", None, _count),
+    "cq_stage_1_opp_dm": MetricDefinition(*_CREATED, "cq", None, _currency()),
+    "qtd_pipeline_attainment": MetricDefinition(*_CREATED, "cq", None, _qtd_pipeline_attainment),
+    "cq_comms_pipeline_dm": MetricDefinition(*_CREATED, "cq_to_date", "COMMS_VS_IDENTITY", _split_dm("Communications")),
+    "cq_di_pipeline_dm": MetricDefinition(*_CREATED, "cq_to_date", "COMMS_VS_IDENTITY", _split_dm("Identity")),
+    "cq_bundle_pipeline_dm": MetricDefinition(*_CREATED, "cq_to_date", "COMMS_VS_IDENTITY", _split_dm("Bundle")),
+    "cq_support_pipeline_dm": MetricDefinition(*_CREATED, "cq_to_date", "COMMS_VS_IDENTITY", _split_dm("Services")),
+    "cq_comms_pipeline_percent": MetricDefinition(*_CREATED, "cq_to_date", "COMMS_VS_IDENTITY", _split_percent("Communications")),
+    "cq_di_pipeline_percent": MetricDefinition(*_CREATED, "cq_to_date", "COMMS_VS_IDENTITY", _split_percent("Identity")),
+    "cq_bundle_pipeline_percent": MetricDefinition(*_CREATED, "cq_to_date", "COMMS_VS_IDENTITY", _split_percent("Bundle")),
+    "cq_support_pipeline_percent": MetricDefinition(*_CREATED, "cq_to_date", "COMMS_VS_IDENTITY", _split_percent("Services")),
+    "cq_apac_pipeline_dm": MetricDefinition(*_CREATED, "cq_to_date", "REGION", _split_dm("APAC")),
+    "cq_emea_pipeline_dm": MetricDefinition(*_CREATED, "cq_to_date", "REGION", _split_dm("EMEA")),
+    "cq_latam_pipeline_dm": MetricDefinition(*_CREATED, "cq_to_date", "REGION", _split_dm("LATAM")),
+    "cq_na_pipeline_dm": MetricDefinition(*_CREATED, "cq_to_date", "REGION", _split_dm("North America")),
+    "cq_apac_pipeline_percent": MetricDefinition(*_CREATED, "cq_to_date", "REGION", _split_percent("APAC")),
+    "cq_emea_pipeline_percent": MetricDefinition(*_CREATED, "cq_to_date", "REGION", _split_percent("EMEA")),
+    "cq_latam_pipeline_percent": MetricDefinition(*_CREATED, "cq_to_date", "REGION", _split_percent("LATAM")),
+    "cq_na_pipeline_percent": MetricDefinition(*_CREATED, "cq_to_date", "REGION", _split_percent("North America")),
+}
+
+for _n in range(1, 5):
+    METRICS[f"cq_minus_{_n}"] = _static(lambda report, n=_n: report.calendar.cq_minus(n))
+    METRICS[f"cq_minus_{_n}_booked_dm"] = MetricDefinition(*_BOOKED, "trailing_4q", QUARTER, _quarter_dm(_n))
+
+# Top opportunity lists, expanded to fields <prefix>_1..<prefix>_<top_n>
+TOP_LISTS: dict[str, tuple[Category, str]] = {
+    "cw_booked_opp": (Category.BOOKED, "cw"),
+    "cm_commit_opp": (Category.COMMIT, "cm"),
+    "cq_best_case_opp": (Category.BEST_CASE, "cq"),
+    "business_terms_opp": (Category.BUSINESS_TERMS, "cq"),
+    "cw_created_opp": (Category.STAGE_1, "cw"),
+}
+
+
+_TOP_FIELD = re.compile(r"_opp_(\d+)$")
+
+
+def top_n_for_fields(fields: Iterable[str]) -> int:
+    """
+    Returns the number of top opportunities <fields> ask for, i.e. the largest <n> of
+    any <list>_opp_<n> field, or DEFAULT_TOP_N if there are none
+    """
+    return max(
+        (int(match.group(1)) for field in fields if (match := _TOP_FIELD.search(field))),
+        default=DEFAULT_TOP_N,
+    )
+
+
+@cache
+def metric_definitions(top_n: int = DEFAULT_TOP_N) -> dict[str, MetricDefinition]:
+    """
+    Returns METRICS plus the TOP_LISTS fields for <top_n> opportunities per list
+    """
+    definitions = dict(METRICS)
+    for prefix, (category, window) in TOP_LISTS.items():
+        for n in range(top_n):
+            definitions[f"{prefix}_{n + 1}"] = MetricDefinition(
+                category, Metric.DM, window, TOP, _top_opp(n)
+            )
+    # Quarter commits leave out the opportunities already listed for this month
+    for n in range(top_n):
+        definitions[f"cq_commit_opp_{n + 1}"] = _static(
+            lambda report, n=n: _fmt_opp(report.cq_top_commits[n])
+        )
+    return definitions
+
+
+def register_metric(name: str, definition: MetricDefinition) -> None:
+    """
+    Adds or replaces a template field definition
+    """
+    METRICS[name] = definition
+    metric_definitions.cache_clear()
+
+
+class MetricReport:
+    """
+    Evaluates metric definitions for one report date.\n
+    The requests behind the wanted fields form one execution plan that the engine
+    prepares together, so a subset, cube or quarter series shared by many fields is
+    built once. Each request and each field is evaluated on first use and memoized,
+    and the time spent on each field is kept in <timings>.
+    """
+
+    def __init__(
+        self,
+        engine: AggregationEngine,
+        calendar: ReportCalendar,
+        management_call: Decimal,
+        monthly_pipe_target: Decimal,
+        quarterly_booking_target: Decimal,
+        top_n: int = DEFAULT_TOP_N,
+    ):
+        self.engine = engine
+        self.calendar = calendar
+        self.management_call = management_call
+        self.monthly_pipe_target = monthly_pipe_target
+        self.quarterly_booking_target = quarterly_booking_target
+        self.top_n = top_n
+        self.definitions = metric_definitions(top_n)
+        self.timings: dict[str, float] = {}
+        self._results = {}
+        self._values = {}
+
+    def request(
+        self, definition: MetricDefinition
+    ) -> Total | Split | Top | QuarterSeries | None:
+        if definition.category is None:
+            return None
+
+        window = self.calendar.window(definition.window)
+        match definition.group:
+            case None:
+                return Total(definition.category, definition.metric, *window)
+            case "QUARTER":
+                return QuarterSeries(
+                    definition.category,
+                    definition.metric,
+                    dq.from_date(window.start_date),
+                    dq.from_date(window.end_date),
+                )
+            case "TOP":
+                return Top(definition.category, *window, number=self.top_n)
+            case field:
+                return Split(definition.category, field, *window)
+
+    def plan(self, fields: Iterable[str]) -> set:
+        """
+        Returns the distinct requests needed for <fields> and prepares them together
+        """
+        requests = {self.request(self.definitions[field]) for field in fields} - {None}
+        with span("metrics.plan"):
+            self.engine.prepare(requests)
+        return requests
+
+    def result(self, request: Total | Split | Top | QuarterSeries):
+        if request not in self._results:
+            self._results[request] = self.engine.evaluate(request)
+        return self._results[request]
+
+    def value(self, field: str):
+        """
+        Returns the formatted value of <field>, computing it on first use
+        """
+        if field not in self._values:
+            with span(f"metric.{field}") as metric_span:
+                definition = self.definitions[field]
+                request = self.request(definition)
+                self._values[field] = definition.formatter(
+                    None if request is None else self.result(request), self
+                )
+            self.timings[field] = metric_span.duration
+        return self._values[field]
+
+    @cached_property
+    def cq_top_commits(self) -> list:
+        month_commits = self.result(self.request(self.definitions["cm_commit_opp_1"]))
+        return self.engine.top(
+            Top(Category.COMMIT, *self.calendar.cq, number=self.top_n),
+            exclude=month_commits,
+        )
+
+    @cached_property
+    def gap_coverage(self) -> dict | None:
+        """
+        Management call gap data from the quarter's forecast split, None without a management call
+        """
+        if self.management_call <= 0:
+            return None
+        forecast = self.result(self.request(self.definitions["cq_commit_dm"]))
+        return add_gap_coverage(dict(forecast), self.management_call)["Management Call"]
+
+    def evaluate(self, fields: Iterable[str] | None = None) -> dict:
+        """
+        Returns the values of <fields> (default: every defined field), skipping
+        unknown fields and fields whose formatter returns None
+        """
+        if fields is None:
+            fields = self.definitions.keys()
+        fields = [field for field in fields if field in self.definitions]
+
+        requests = self.plan(fields)
+        values = {field: self.value(field) for field in fields}
+
+        log.debug(
+            "Computed {} fields from {} requests in {}ms".format(
+                len(fields),
+                len(requests),
+                round(sum(self.timings[field] for field in fields) * 1000, 2),
+            )
+        )
+        return {field: value for field, value in values.items() if value is not None}
@@ -1,27 +1,168 @@
 import logging as log
+import pandas as pd
 
-from os import environ
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from os import path
 from simple_salesforce import Salesforce
 from string import Template
+from typing import Iterator
 
+from instrumentation import span
 
-def run_salesforce_query(query: str) -> dict:
-    """Returns a Dictionary generated from a Salesforce Session QueryAll"""
+from .session import SalesforceSessionManager
+from .transformations import bulk_csv_to_dataframe, salesforce_batches_to_dataframe
 
-    salesforce_session = Salesforce(
-        username=environ["USERNAME"],
-        password=environ["PASSWORD"],
-        security_token=environ["SECURITY_TOKEN"],
-    )
+BULK_THRESHOLD = 50_000
+SESSION_CACHE_PATH = path.join(
+    path.dirname(path.dirname(path.realpath(__file__))), ".salesforce_session.json"
+)
+
+
+@cache
+def _login() -> SalesforceSessionManager:
+    """
+    Returns the process-wide session manager, logged in with credentials from the environment
+    """
+    return SalesforceSessionManager.from_environ(cache_path=SESSION_CACHE_PATH)
+
+
+def run_salesforce_query(
+    query: str,
+    salesforce_session: Salesforce | None = None,
+    include_deleted: bool = False,
+) -> dict:
+    """
+    Returns a Dictionary generated from a Salesforce Session QueryAll\n
+    [Optional] salesforce_session: any object with a simple-salesforce style query_all.
+    Defaults to the shared session manager, logged in with credentials from the environment\n
+    [Optional] include_deleted: also return deleted (IsDeleted = True) records
+    """
+
+    if salesforce_session is None:
+        salesforce_session = _login()
     log.debug("Querying salesforce")
-    query_response = dict(salesforce_session.query_all(query=query))
+    with span("salesforce.query") as query_span:
+        query_response = dict(
+            salesforce_session.query_all(query=query, include_deleted=include_deleted)
+        )
+        query_span.rows = len(query_response["records"])
     
     return query_response
 
 
+def iter_salesforce_query(
+    query: str,
+    salesforce_session: Salesforce | None = None,
+    include_deleted: bool = False,
+    first_page: dict | None = None,
+) -> Iterator[list[dict]]:
+    """
+    Yields the records of a Salesforce query one page at a time\n
+    The next page is requested in the background while the caller processes the
+    current one, so at most two pages are held in memory.\n
+    [Optional] first_page: an already fetched first response for <query>
+    """
+
+    if salesforce_session is None:
+        salesforce_session = _login()
+    log.debug("Streaming salesforce query")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        page = first_page or salesforce_session.query(
+            query, include_deleted=include_deleted
+        )
+        while True:
+            next_page = None
+            if not page["done"]:
+                next_page = executor.submit(
+                    salesforce_session.query_more,
+                    page["nextRecordsUrl"],
+                    identifier_is_url=True,
+                    include_deleted=include_deleted,
+                )
+            yield page["records"]
+
+            if next_page is None:
+                break
+            page = next_page.result()
+
+
+def iter_bulk_query(
+    query: str,
+    salesforce_session: Salesforce | None = None,
+    include_deleted: bool = False,
+) -> Iterator[str]:
+    """
+    Runs an Opportunity query as a Bulk API 2.0 job, yielding each CSV result chunk
+    """
+
+    if salesforce_session is None:
+        salesforce_session = _login()
+    log.debug("Submitting salesforce bulk query")
+
+    bulk_opportunity = salesforce_session.bulk2.Opportunity
+    if include_deleted:
+        yield from bulk_opportunity.query_all(query)
+    else:
+        yield from bulk_opportunity.query(query)
+
+
+def fetch_opportunities(
+    query: str,
+    salesforce_session: Salesforce | None = None,
+    bulk_threshold: int = BULK_THRESHOLD,
+) -> pd.DataFrame:
+    """
+    Returns the standardized DataFrame for <query>\n
+    Reads the first REST page and, when totalSize is over <bulk_threshold>, discards it and
+    extracts the rest through Bulk API 2.0. Smaller results keep streaming over REST.
+    """
+
+    with span("salesforce.fetch") as fetch_span:
+        data = _fetch_opportunities(query, salesforce_session, bulk_threshold)
+        fetch_span.rows = data.shape[0]
+    return data
+
+
+def _fetch_opportunities(
+    query: str, salesforce_session: Salesforce | None, bulk_threshold: int
+) -> pd.DataFrame:
+    if salesforce_session is None:
+        salesforce_session = _login()
+
+    first_page = salesforce_session.query(query)
+    log.debug("Salesforce query totalSize: {}".format(first_page["totalSize"]))
+
+    if not first_page["done"] and first_page["totalSize"] > bulk_threshold:
+        log.info("Using Bulk API 2.0 for {} records".format(first_page["totalSize"]))
+        return bulk_csv_to_dataframe(
+            iter_bulk_query(query=query, salesforce_session=salesforce_session)
+        )
+
+    return salesforce_batches_to_dataframe(
+        iter_salesforce_query(
+            query=query, salesforce_session=salesforce_session, first_page=first_page
+        )
+    )
+
+
+def delta_query(modified_after: str) -> str:
+    """
+    Returns a query for every Opportunity modified after a SOQL datetime\n
+    Unlike SALESFORCE_QUERY it has no record type or date filter, so records that
+    stop matching them are returned too; OpportunitySnapshot applies those filters
+    locally and removes such records.
+    """
+    return SNAPSHOT_DELTA_QUERY.substitute({"MODIFIED_AFTER": modified_after})
+
+
 SALESFORCE_QUERY = Template(
     """
 SELECT 
+    Id, 
+    SystemModstamp, 
+    IsDeleted, 
     Name, 
     StageName, 
     ForecastCategoryName, 
@@ -37,3 +178,25 @@ WHERE
     AND (CloseDate >= $MIN_DATE OR CreatedDate >= $MIN_DATETIME)
 """
 )
+
+SNAPSHOT_DELTA_QUERY = Template(
+    """
+SELECT 
+    Id, 
+    SystemModstamp, 
+    IsDeleted, 
+    IsSalesRecordType__c, 
+    Name, 
+    StageName, 
+    ForecastCategoryName, 
+    Comms_vs_Identity__c, 
+    Sales_Team_Region__c, 
+    CloseDate, 
+    Amount_Direct_Margin__c, 
+    CreatedDate, 
+    SAO_Date__c 
+FROM Opportunity 
+WHERE 
+    SystemModstamp > $MODIFIED_AFTER
+"""
+)
@@ -0,0 +1,126 @@
+import datetime as dt
+import json
+import logging
+import os
+import requests
+
+from simple_salesforce import Salesforce, SalesforceExpiredSession, SalesforceLogin
+
+log = logging.getLogger(__name__)
+
+SESSION_LIFETIME = dt.timedelta(hours=2)
+
+
+class SalesforceSessionManager:
+    """
+    Logs in to Salesforce once and reuses the session across queries and runs.\n
+    The session id and instance are cached in <cache_path> until <lifetime> has passed,
+    and every request goes through one pooled requests.Session. Calls that fail with
+    INVALID_SESSION_ID log in again and are retried once.
+    """
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        security_token: str,
+        cache_path: str | None = None,
+        lifetime: dt.timedelta = SESSION_LIFETIME,
+    ):
+        self._username = username
+        self._password = password
+        self._security_token = security_token
+        self._cache_path = cache_path
+        self._lifetime = lifetime
+        self._http = requests.Session()
+        self._salesforce: Salesforce | None = None
+
+    @classmethod
+    def from_environ(cls, cache_path: str | None = None):
+        return cls(
+            username=os.environ["USERNAME"],
+            password=os.environ["PASSWORD"],
+            security_token=os.environ["SECURITY_TOKEN"],
+            cache_path=cache_path,
+        )
+
+    def _connect(self, session_id: str, instance: str) -> Salesforce:
+        return Salesforce(session_id=session_id, instance=instance, session=self._http)
+
+    def _read_cache(self) -> dict | None:
+        if not self._cache_path or not os.path.exists(self._cache_path):
+            return None
+        try:
+            with open(self._cache_path, mode="rt") as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+        if cached.get("username") != self._username:
+            return None
+        if dt.datetime.fromisoformat(cached["expires"]) <= dt.datetime.now(dt.timezone.utc):
+            return None
+        return cached
+
+    def _write_cache(self, session_id: str, instance: str) -> None:
+        if not self._cache_path:
+            return
+        cached = {
+            "username": self._username,
+            "session_id": session_id,
+            "instance": instance,
+            "expires": (dt.datetime.now(dt.timezone.utc) + self._lifetime).isoformat(),
+        }
+        file_descriptor = os.open(
+            self._cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600
+        )
+        # O_CREAT only applies the mode to new files; tighten an existing one too
+        os.fchmod(file_descriptor, 0o600)
+        with os.fdopen(file_descriptor, mode="wt") as cache_file:
+            json.dump(cached, cache_file)
+
+    def login(self) -> Salesforce:
+        """
+        Runs a fresh login and caches the new session
+        """
+        log.debug("Logging in to salesforce")
+        session_id, instance = SalesforceLogin(
+            username=self._username,
+            password=self._password,
+            security_token=self._security_token,
+            session=self._http,
+        )
+        self._write_cache(session_id, instance)
+        self._salesforce = self._connect(session_id, instance)
+        return self._salesforce
+
+    def salesforce(self) -> Salesforce:
+        """
+        Returns the current session, from memory, the cache file or a new login
+        """
+        if self._salesforce is None:
+            cached = self._read_cache()
+            if cached:
+                log.debug("Reusing cached salesforce session")
+                self._salesforce = self._connect(cached["session_id"], cached["instance"])
+            else:
+                self.login()
+        return self._salesforce
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        attribute = getattr(self.salesforce(), name)
+        if not callable(attribute):
+            return attribute
+
+        def _call_with_login_retry(*args, **kwargs):
+            try:
+                return getattr(self.salesforce(), name)(*args, **kwargs)
+            except SalesforceExpiredSession:
+                log.info("Salesforce session expired, logging in again")
+                self.login()
+                return getattr(self.salesforce(), name)(*args, **kwargs)
+
+        return _call_with_login_retry
@@ -0,0 +1,200 @@
+import datetime as dt
+import logging
+import pandas as pd
+import sqlite3
+
+from simple_salesforce import Salesforce
+
+from instrumentation import span
+
+from .query import SALESFORCE_QUERY, delta_query, run_salesforce_query
+from .transformations import SALESFORCE_FIELDS, normalize_salesforce_data
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_FIELDS = ["Id", "SystemModstamp", *SALESFORCE_FIELDS]
+
+
+class OpportunitySnapshot:
+    """
+    Local SQLite copy of the queried Opportunity records, keyed by Id.\n
+    Stores the raw Salesforce values so a reload goes through the same
+    normalize_salesforce_data path as a live query.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._connection = sqlite3.connect(file_path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS opportunities ({}, PRIMARY KEY (Id))".format(
+                ", ".join(SNAPSHOT_FIELDS)
+            )
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _get_state(self, key: str) -> str | None:
+        row = self._connection.execute(
+            "SELECT value FROM sync_state WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: str) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def min_date(self) -> str | None:
+        return self._get_state("min_date")
+
+    def last_sync(self) -> str | None:
+        return self._get_state("last_sync")
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM opportunities").fetchone()[0]
+
+    def merge(
+        self, records: list[dict], replace: bool = False, min_date: str | None = None
+    ) -> None:
+        """
+        Upserts <records> by Id and removes any marked IsDeleted or no longer of the
+        sales record type (IsSalesRecordType__c = False).\n
+        When <replace> = True, existing records are discarded first.
+        """
+        removed = [row for row in records if not _is_current(row)]
+        deleted = [(row["Id"],) for row in removed]
+        current = [
+            tuple(row[field] for field in SNAPSHOT_FIELDS)
+            for row in records
+            if _is_current(row)
+        ]
+
+        with self._connection:
+            if replace:
+                self._connection.execute("DELETE FROM opportunities")
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO opportunities VALUES ({})".format(
+                    ", ".join("?" * len(SNAPSHOT_FIELDS))
+                ),
+                current,
+            )
+            self._connection.executemany(
+                "DELETE FROM opportunities WHERE Id = ?", deleted
+            )
+
+            modstamps = [row["SystemModstamp"] for row in records]
+            if not replace and self.last_sync():
+                modstamps.append(self.last_sync())
+            if modstamps:
+                self._set_state("last_sync", max(modstamps))
+            if min_date is not None:
+                self._set_state("min_date", min_date)
+
+        log.debug(
+            "Merged {} records ({} deleted) into snapshot".format(
+                len(current), len(deleted)
+            )
+        )
+
+    def prune(self, min_date: str) -> int:
+        """
+        Removes records outside the SALESFORCE_QUERY date filter for <min_date>, i.e.
+        closing and created before it, and records <min_date> as the snapshot's start.
+        Returns the number of records removed.
+        """
+        with self._connection:
+            removed = self._connection.execute(
+                "DELETE FROM opportunities WHERE NOT ("
+                "COALESCE(CloseDate >= :min_date, 0) "
+                "OR COALESCE(substr(CreatedDate, 1, 10) >= :min_date, 0))",
+                {"min_date": min_date},
+            ).rowcount
+            self._set_state("min_date", min_date)
+
+        log.debug("Pruned {} records before {} from snapshot".format(removed, min_date))
+        return removed
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Returns the stored records as a standardized DataFrame\n
+        Raises ValueError if the snapshot holds no records, e.g. before its first sync.
+        """
+        if not len(self):
+            raise ValueError(
+                "Opportunity snapshot {} holds no records; run with --use-snapshot "
+                "to sync it first".format(self.file_path)
+            )
+        with span("ingest") as ingest_span:
+            data = pd.read_sql_query(
+                "SELECT {} FROM opportunities".format(", ".join(SALESFORCE_FIELDS)),
+                self._connection,
+            )
+            ingest_span.rows = data.shape[0]
+            return normalize_salesforce_data(data.rename(columns=SALESFORCE_FIELDS))
+
+
+def _is_current(record: dict) -> bool:
+    return not record.get("IsDeleted") and record.get("IsSalesRecordType__c") is not False
+
+
+def _soql_datetime(modstamp: str) -> str:
+    """
+    Converts a Salesforce SystemModstamp ('2024-06-15T12:34:56.000+0000') to a SOQL literal
+    """
+    timestamp = dt.datetime.strptime(modstamp, "%Y-%m-%dT%H:%M:%S.%f%z")
+    return timestamp.astimezone(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def sync_snapshot(
+    snapshot: OpportunitySnapshot,
+    min_date: str,
+    salesforce_session: Salesforce | None = None,
+) -> pd.DataFrame:
+    """
+    Brings <snapshot> up to date and returns it as a standardized DataFrame.\n
+    Only records modified since the last sync are fetched, whether or not they still
+    match SALESFORCE_QUERY; the record type and date filters are then applied locally
+    so records that stopped matching are removed. A full query is run when the
+    snapshot is empty or starts later than <min_date>.
+    """
+    salesforce_query = SALESFORCE_QUERY.substitute(
+        {"MIN_DATE": min_date, "MIN_DATETIME": f"{min_date}T00:00:00.000Z"}
+    )
+
+    last_sync = snapshot.last_sync()
+    stored_min_date = snapshot.min_date()
+
+    if last_sync is None or stored_min_date is None or stored_min_date > min_date:
+        log.info("Running full Salesforce query for snapshot")
+        raw_data = run_salesforce_query(
+            query=salesforce_query, salesforce_session=salesforce_session
+        )
+        snapshot.merge(raw_data["records"], replace=True, min_date=min_date)
+    else:
+        log.info("Fetching Salesforce changes since {}".format(last_sync))
+        raw_data = run_salesforce_query(
+            query=delta_query(_soql_datetime(last_sync)),
+            salesforce_session=salesforce_session,
+            include_deleted=True,
+        )
+        snapshot.merge(raw_data["records"])
+        snapshot.prune(min_date)
+
+    log.debug(
+        "Snapshot holds {} records, last modified {}".format(
+            len(snapshot), snapshot.last_sync()
+        )
+    )
+
+    return snapshot.to_dataframe()
@@ -0,0 +1,121 @@
+import datetime as dt
+import logging
+import tomllib
+
+from decimal import Decimal
+from os import path
+from typing import NamedTuple
+
+from datequarter import DateQuarter as dq
+
+DEFAULT_QUARTERLY_BOOKING_TARGET = Decimal(1_100_000)
+DEFAULT_MONTHLY_PIPE_TARGET = Decimal(861326)
+DEFAULT_TEMPLATE = "default.txt"
+# Template variants without the management call section, used when none is set
+NO_MANAGEMENT_CALL_TEMPLATES = {
+    "default.txt": "default_no_mgmt_call.txt",
+    "default_old.txt": "default_old_no_mgmt_call.txt",
+}
+
+log = logging.getLogger(__name__)
+
+
+class ReportTargets(NamedTuple):
+    management_call: Decimal | None
+    quarterly_booking_target: Decimal | None
+    monthly_pipe_target: Decimal | None
+
+    def with_defaults(self) -> "ReportTargets":
+        """
+        Fills unset targets with the default values. management_call is left unset.
+        """
+        return self._replace(
+            quarterly_booking_target=(
+                DEFAULT_QUARTERLY_BOOKING_TARGET
+                if self.quarterly_booking_target is None
+                else self.quarterly_booking_target
+            ),
+            monthly_pipe_target=(
+                DEFAULT_MONTHLY_PIPE_TARGET
+                if self.monthly_pipe_target is None
+                else self.monthly_pipe_target
+            ),
+        )
+
+
+def load_config(file_path: str) -> dict:
+    """
+    Reads a TOML targets file, returning an empty config if it does not exist\n
+    Values can be set under [defaults], per quarter under [quarters."Q3-2024"]
+    and per month under [months."2024-07"].
+    """
+    if not path.exists(file_path):
+        log.debug("No config file at {}".format(file_path))
+        return {}
+
+    with open(file_path, mode="rb") as config_file:
+        log.debug("Loaded config from {}".format(file_path))
+        return tomllib.load(config_file, parse_float=Decimal)
+
+
+def to_decimal(number: float | None) -> Decimal | None:
+    """
+    Converts a target given on the command line to Decimal, through its shortest
+    repr so 0.1 stays 0.1
+    """
+    return None if number is None else Decimal(str(number))
+
+
+def _lookup(config: dict, key: str, date: dt.date):
+    """
+    Returns the most specific value of <key> for <date>: month, then quarter, then defaults
+    """
+    for section, name in (
+        ("months", date.strftime("%Y-%m")),
+        ("quarters", str(dq.from_date(date))),
+    ):
+        value = config.get(section, {}).get(name, {}).get(key)
+        if value is not None:
+            return Decimal(value)
+
+    value = config.get("defaults", {}).get(key)
+    return Decimal(value) if value is not None else None
+
+
+def targets_for_date(
+    config: dict,
+    date: dt.date,
+    management_call: Decimal | None = None,
+    quarterly_booking_target: Decimal | None = None,
+    monthly_pipe_target: Decimal | None = None,
+) -> ReportTargets:
+    """
+    Resolves report targets for <date>. Arguments that are not None override the config.\n
+    Targets set by neither are None; see ReportTargets.with_defaults.
+    """
+    if management_call is None:
+        management_call = _lookup(config, "management_call", date)
+    if quarterly_booking_target is None:
+        quarterly_booking_target = _lookup(config, "quarterly_booking_target", date)
+    if monthly_pipe_target is None:
+        monthly_pipe_target = _lookup(config, "monthly_pipe_target", date)
+
+    return ReportTargets(
+        management_call=management_call,
+        quarterly_booking_target=quarterly_booking_target,
+        monthly_pipe_target=monthly_pipe_target,
+    )
+
+
+def select_template(
+    management_call: Decimal | None, template_name: str = DEFAULT_TEMPLATE
+) -> tuple[Decimal, str]:
+    """
+    Returns the (management_call, template_name) to render with.\n
+    An unset or zero <management_call> becomes Decimal(0) and <template_name> is swapped
+    for its NO_MANAGEMENT_CALL_TEMPLATES variant, so no management call or gap
+    placeholders are left in the report.
+    """
+    if not management_call:
+        return Decimal(0), NO_MANAGEMENT_CALL_TEMPLATES.get(template_name, template_name)
+    return management_call, template_name
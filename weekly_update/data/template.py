@@ -0,0 +1,44 @@
+import logging
+
+from functools import cache
+from os import path
+from string import Template
+
+from instrumentation import span
+
+log = logging.getLogger(__name__)
+
+
+class CompiledTemplate:
+    """
+    A report template parsed once, with the set of placeholder <fields> it uses.\n
+    Pass <fields> to generate_weekly_update_dict so only those values are computed.
+    """
+
+    def __init__(self, text: str):
+        self._template = Template(text)
+        if not self._template.is_valid():
+            raise ValueError("Template contains invalid placeholders")
+        self.fields = frozenset(self._template.get_identifiers())
+
+    def render(self, template_data: dict) -> str:
+        with span("template.render"):
+            return self._template.safe_substitute(template_data)
+
+
+@cache
+def _compile(template_path: str, modified: float) -> CompiledTemplate:
+    with open(template_path, mode="rt") as template_file:
+        compiled = CompiledTemplate(template_file.read())
+    log.debug(
+        "Compiled template {} with {} fields".format(template_path, len(compiled.fields))
+    )
+    return compiled
+
+
+def compile_template(template_path: str) -> CompiledTemplate:
+    """
+    Returns the compiled template at <template_path>, parsing it only when it is
+    first used or has changed on disk
+    """
+    return _compile(template_path, path.getmtime(template_path))
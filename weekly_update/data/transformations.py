@@ -1,15 +1,57 @@
+import csv
 import datetime as dt
+import heapq
+import io
 import numpy as np
 import logging
 import pandas as pd
-import pytz
 
 from decimal import Decimal
 from enum import IntEnum
-from .formatting import _d_round
+from os import path
+from typing import Iterable
+from .formatting import _d_round, cents_to_decimal
+
+from instrumentation import span
 
 DM_FIELD = "DM"
 DATE_FIELDS = ["CLOSEDATE", "STAGE_1_DATE"]
+CATEGORICAL_FIELDS = ["STAGENAME", "FORECAST_CATEGORY", "REGION", "COMMS_VS_IDENTITY"]
+SALESFORCE_FIELDS = {
+    "Name": "NAME",
+    "StageName": "STAGENAME",
+    "ForecastCategoryName": "SF_FCST",
+    "Comms_vs_Identity__c": "COMMS_VS_IDENTITY",
+    "Sales_Team_Region__c": "REGION",
+    "CloseDate": "CLOSEDATE",
+    "Amount_Direct_Margin__c": "DM",
+    "CreatedDate": "CREATED_DATE",
+    "SAO_Date__c": "SAO_DATE",
+}
+# Standardized columns the report reads; file inputs are pruned to these
+REPORT_FIELDS = [
+    "NAME",
+    "STAGENAME",
+    "FORECAST_CATEGORY",
+    "COMMS_VS_IDENTITY",
+    "REGION",
+    "CLOSEDATE",
+    DM_FIELD,
+    "CREATED_DATE",
+    "STAGE_1_DATE",
+]
+# File column save_to_file writes DM to, as int64 cents. A file's DM column is dollars.
+DM_CENTS_FIELD = "DM_CENTS"
+# Arrow types for CSV inputs
+CSV_DTYPES = {
+    "NAME": "string[pyarrow]",
+    **{column: "string[pyarrow]" for column in CATEGORICAL_FIELDS},
+    **{column: "timestamp[s][pyarrow]" for column in [*DATE_FIELDS, "CREATED_DATE"]},
+    DM_FIELD: "float64[pyarrow]",
+    DM_CENTS_FIELD: "int64[pyarrow]",
+}
+CLOSED_STAGES = ["Closed-Lost", "Closed-Won"]
+LA_TIMEZONE = "America/Los_Angeles"
 
 log = logging.getLogger(__name__)
 
@@ -17,6 +59,10 @@ class Category(IntEnum):
     STAGE_1 = 1
     PIPELINE = 2
     BOOKED = 3
+    CLOSING = 4
+    COMMIT = 5
+    BEST_CASE = 6
+    BUSINESS_TERMS = 7
 
 
 class Metric(IntEnum):
@@ -24,24 +70,53 @@ class Metric(IntEnum):
     COUNT = 2
 
 
-def standardize_data(df: pd.DataFrame):
-    if isinstance(df.at[0, DM_FIELD], int) or isinstance(df.at[0, DM_FIELD], float):
-        df[DM_FIELD] = df[DM_FIELD].apply(_float_to_decimal)
+def standardize_data(df: pd.DataFrame, dm_as_cents: bool = True):
+    """
+    Normalizes DM and date columns.\n
+    When <dm_as_cents> = True (default) DM is stored as int64 cents, rounded exactly as
+    _float_to_decimal would, and only converted to Decimal once aggregated.
+    Otherwise DM is stored as one Decimal object per row.
+    """
+    if df[DM_FIELD].isna().any():
+        raise TypeError(f"Field {DM_FIELD} contains null values")
+
+    if dm_as_cents:
+        if pd.api.types.is_numeric_dtype(df[DM_FIELD]):
+            df[DM_FIELD] = _float_to_cents(df[DM_FIELD].to_numpy())
+        elif isinstance(df.at[0, DM_FIELD], Decimal):
+            df[DM_FIELD] = df[DM_FIELD].apply(
+                lambda x: int(x.quantize(Decimal("1.00"), rounding="ROUND_HALF_EVEN").scaleb(2))
+            ).astype("int64")
+        else:
+            raise TypeError(
+                f"Field {DM_FIELD} has type {type(df.at[0, DM_FIELD])} instead of int, float or Decimal"
+            )
+    else:
+        if isinstance(df.at[0, DM_FIELD], int) or isinstance(df.at[0, DM_FIELD], float):
+            df[DM_FIELD] = df[DM_FIELD].apply(_float_to_decimal)
+
+        try:
+            assert isinstance(df.at[0, DM_FIELD], Decimal)
+        except AssertionError:
+            raise TypeError(
+                f"Field {DM_FIELD} has type {type(df.at[0, DM_FIELD])} instead of Decimal"
+            )
+
+    return _standardize_columns(df)
 
-    try:
-        assert isinstance(df.at[0, DM_FIELD], Decimal)
-    except AssertionError:
-        raise TypeError(
-            f"Field {DM_FIELD} has type {type(df.at[0, DM_FIELD])} instead of Decimal"
-        )
 
+def _standardize_columns(df: pd.DataFrame) -> pd.DataFrame:
     for col in DATE_FIELDS:
-        if isinstance(df.at[0, col], pd.Timestamp):
-            df[col] = df[col].apply(lambda x: x.date())
-        if isinstance(df.at[0, col], str):
-            df[col] = df[col].apply(
-                lambda x: dt.date.fromisoformat(x) if pd.notnull(x) else x
-            )
+        if not pd.api.types.is_datetime64_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        df[col] = df[col].dt.normalize()
+
+    return _categorize(df)
+
+
+def _categorize(df: pd.DataFrame) -> pd.DataFrame:
+    for col in CATEGORICAL_FIELDS:
+        df[col] = df[col].astype("category")
 
     log.debug(
         "Loaded dataframe, size: {} by {}; {}".format(*df.shape, df.memory_usage())
@@ -51,51 +126,276 @@ def standardize_data(df: pd.DataFrame):
     return df
 
 
+def _file_columns(columns: list[str]) -> list[str]:
+    """
+    Returns the REPORT_FIELDS to read from a file with <columns>, taking DM from
+    DM_CENTS_FIELD when the file has one
+    """
+    if DM_CENTS_FIELD not in columns:
+        return REPORT_FIELDS
+    return [DM_CENTS_FIELD if column == DM_FIELD else column for column in REPORT_FIELDS]
+
+
 def load_from_csv(file_path: str) -> pd.DataFrame:
-    df = pd.read_csv(file_path, parse_dates=DATE_FIELDS)
+    """
+    Loads a standardized opportunity CSV, e.g. one written by save_to_file\n
+    Read by the pyarrow engine with CSV_DTYPES, keeping only REPORT_FIELDS.
+    DM is read as dollars, or as int64 cents from a DM_CENTS column.
+    """
+    with open(file_path, newline="", encoding="utf-8") as csv_file:
+        columns = _file_columns(next(csv.reader(csv_file), []))
+
+    with span("ingest") as ingest_span:
+        df = pd.read_csv(
+            file_path,
+            engine="pyarrow",
+            dtype_backend="pyarrow",
+            usecols=columns,
+            dtype={column: CSV_DTYPES[column] for column in columns},
+        )
+        ingest_span.rows = df.shape[0]
+        return _standardize_arrow(df)
 
-    return standardize_data(df=df)
 
+def load_from_parquet(file_path: str) -> pd.DataFrame:
+    """
+    Loads a standardized opportunity Parquet file, reading only REPORT_FIELDS.\n
+    DM is read as decimal, float or integer dollars, or as int64 cents from a
+    DM_CENTS column (as save_to_file writes it).
+    """
+    import pyarrow.parquet as pq
 
-def salesforce_dict_to_dataframe(raw_data: dict) -> pd.DataFrame:
-    LA_TIMEZONE = pytz.timezone("America/Los_Angeles")
-
-    data = pd.DataFrame(
-        [
-            dict(
-                NAME=row["Name"],
-                STAGENAME=row["StageName"],
-                FORECAST_CATEGORY=None,
-                SF_FCST=row["ForecastCategoryName"],
-                COMMS_VS_IDENTITY=row["Comms_vs_Identity__c"],
-                REGION=row["Sales_Team_Region__c"],
-                CLOSEDATE=row["CloseDate"],
-                DM=row["Amount_Direct_Margin__c"],
-                CREATED_DATE=dt.datetime.fromisoformat(
-                    f"{row['CreatedDate'][0:-5]}+00:00"
-                )
-                .astimezone(tz=LA_TIMEZONE)
-                .date(),
-                SAO_DATE=row["SAO_Date__c"],
+    columns = _file_columns(pq.read_schema(file_path).names)
+
+    with span("ingest") as ingest_span:
+        df = pd.read_parquet(
+            file_path, engine="pyarrow", dtype_backend="pyarrow", columns=columns
+        )
+        ingest_span.rows = df.shape[0]
+        return _standardize_arrow(df)
+
+
+def load_from_file(file_path: str) -> pd.DataFrame:
+    """
+    Loads a CSV (.csv) or Parquet (.parquet, .pq) opportunity snapshot
+    """
+    match path.splitext(file_path)[1].lower():
+        case ".csv":
+            return load_from_csv(file_path)
+        case ".parquet" | ".pq":
+            return load_from_parquet(file_path)
+    raise ValueError(
+        "Unsupported input file {}, expected .csv or .parquet".format(file_path)
+    )
+
+
+def save_to_file(data: pd.DataFrame, file_path: str) -> str:
+    """
+    Writes the REPORT_FIELDS of a standardized DataFrame to a .csv or .parquet file
+    that load_from_file reads back unchanged. DM is written as int64 cents to a
+    DM_CENTS column, so it is never mistaken for dollars.
+    """
+    if not pd.api.types.is_integer_dtype(data[DM_FIELD]):
+        raise TypeError(f"Field {DM_FIELD} must be int64 cents, not {data[DM_FIELD].dtype}")
+    data = data[REPORT_FIELDS].rename(columns={DM_FIELD: DM_CENTS_FIELD})
+
+    match path.splitext(file_path)[1].lower():
+        case ".csv":
+            data.to_csv(file_path, index=False)
+        case ".parquet" | ".pq":
+            data.to_parquet(file_path, engine="pyarrow", index=False)
+        case _:
+            raise ValueError(
+                "Unsupported output file {}, expected .csv or .parquet".format(file_path)
             )
-            for row in raw_data["records"]
-        ]
+    return file_path
+
+
+def _standardize_arrow(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    standardize_data for Arrow-backed columns, converted column-at-a-time.\n
+    A DM_CENTS column is already int64 cents and is renamed to DM. DM is dollars:
+    decimal DM is rounded half-even to cents in Arrow, integer DM is scaled and
+    float DM goes through _float_to_cents.
+    """
+    dm_in_cents = DM_CENTS_FIELD in df.columns
+    if dm_in_cents:
+        df = df.rename(columns={DM_CENTS_FIELD: DM_FIELD})
+
+    dm = df[DM_FIELD]
+    if dm.isna().any():
+        raise TypeError(f"Field {DM_FIELD} contains null values")
+
+    if dm_in_cents:
+        if not pd.api.types.is_integer_dtype(dm):
+            raise TypeError(
+                f"Field {DM_CENTS_FIELD} has type {dm.dtype} instead of int"
+            )
+        df[DM_FIELD] = dm.to_numpy(dtype="int64")
+    elif str(dm.dtype).startswith("decimal"):
+        df[DM_FIELD] = (dm.round(2) * 100).astype("int64")
+    elif pd.api.types.is_integer_dtype(dm):
+        df[DM_FIELD] = dm.to_numpy(dtype="int64") * 100
+    elif pd.api.types.is_float_dtype(dm):
+        df[DM_FIELD] = _float_to_cents(dm.to_numpy(dtype="float64"))
+    else:
+        raise TypeError(
+            f"Field {DM_FIELD} has type {dm.dtype} instead of decimal, float or int"
+        )
+
+    df["NAME"] = df["NAME"].astype(object)
+    for col in [*DATE_FIELDS, "CREATED_DATE"]:
+        df[col] = df[col].astype("datetime64[ns]")
+    for col in CATEGORICAL_FIELDS:
+        df[col] = df[col].astype(object)
+
+    return _standardize_columns(df)
+
+
+def _salesforce_chunk(records: list[dict]) -> dict[str, np.ndarray]:
+    """
+    Converts one batch of Salesforce records to the typed columns of
+    normalize_salesforce_data, before categoricals
+    """
+    raw = {
+        column: [row[field] for row in records]
+        for field, column in SALESFORCE_FIELDS.items()
+    }
+
+    dm = np.array(raw[DM_FIELD], dtype="float64")
+    if np.isnan(dm).any():
+        raise TypeError(f"Field {DM_FIELD} contains null values")
+
+    stages = np.array(raw["STAGENAME"], dtype=object)
+
+    created_date = (
+        pd.to_datetime(raw["CREATED_DATE"], utc=True, format="ISO8601")
+        .tz_convert(LA_TIMEZONE)
+        .tz_localize(None)
+        .normalize()
     )
+    return {
+        "NAME": np.array(raw["NAME"], dtype=object),
+        "STAGENAME": stages,
+        "FORECAST_CATEGORY": np.where(
+            np.isin(stages, CLOSED_STAGES), "Won", np.array(raw["SF_FCST"], dtype=object)
+        ),
+        "COMMS_VS_IDENTITY": np.array(raw["COMMS_VS_IDENTITY"], dtype=object),
+        "REGION": np.array(raw["REGION"], dtype=object),
+        "CLOSEDATE": pd.to_datetime(raw["CLOSEDATE"], errors="coerce")
+        .normalize()
+        .to_numpy(),
+        DM_FIELD: _float_to_cents(dm),
+        "CREATED_DATE": created_date.to_numpy(),
+        "SAO_DATE": np.array(raw["SAO_DATE"], dtype=object),
+        "STAGE_1_DATE": pd.to_datetime(raw["SAO_DATE"], errors="coerce", format="ISO8601")
+        .normalize()
+        .to_numpy(),
+    }
+
+
+class SalesforceFrameBuilder:
+    """
+    Collects Salesforce records one batch at a time.\n
+    Each batch is converted to typed columns as it arrives (DM as int64 cents, dates
+    as datetime64, FORECAST_CATEGORY resolved), so the work overlaps with fetching
+    the next page; to_dataframe only concatenates them and sets the categoricals.
+    """
+
+    def __init__(self):
+        self._chunks: list[dict[str, np.ndarray]] = []
+        self._rows = 0
 
-    def _set_fcst_cat(val):
-        if val in ("Closed-Lost", "Closed-Won"):
-            return "Won"
+    def __len__(self):
+        return self._rows
 
-    data["FORECAST_CATEGORY"] = data["STAGENAME"].apply(_set_fcst_cat)
-    data["FORECAST_CATEGORY"] = np.where(
-        data["FORECAST_CATEGORY"].isna(), data["SF_FCST"], data["FORECAST_CATEGORY"]
+    def extend(self, records: list[dict]) -> None:
+        if not records:
+            return
+        self._chunks.append(_salesforce_chunk(records))
+        self._rows += len(records)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        if not self._chunks:
+            return normalize_salesforce_data(
+                pd.DataFrame({column: [] for column in SALESFORCE_FIELDS.values()})
+            )
+        return _categorize(
+            pd.DataFrame(
+                {
+                    column: np.concatenate([chunk[column] for chunk in self._chunks])
+                    for column in self._chunks[0]
+                }
+            )
+        )
+
+
+def salesforce_dict_to_dataframe(raw_data: dict) -> pd.DataFrame:
+    return salesforce_batches_to_dataframe([raw_data["records"]])
+
+
+def salesforce_batches_to_dataframe(batches: Iterable[list[dict]]) -> pd.DataFrame:
+    """
+    Builds the standardized DataFrame from batches of Salesforce records, e.g. the
+    pages yielded by query.iter_salesforce_query
+    """
+    with span("ingest") as ingest_span:
+        builder = SalesforceFrameBuilder()
+        for records in batches:
+            builder.extend(records)
+            log.debug("Received {} records".format(len(builder)))
+
+        ingest_span.rows = len(builder)
+        return builder.to_dataframe()
+
+
+def bulk_csv_to_dataframe(chunks: Iterable[str]) -> pd.DataFrame:
+    """
+    Builds the standardized DataFrame from Bulk API CSV result chunks\n
+    Only empty values are read as null, so names such as "NA" are kept as text.
+    """
+    with span("ingest") as ingest_span:
+        frames = [
+            pd.read_csv(
+                io.StringIO(chunk),
+                usecols=list(SALESFORCE_FIELDS),
+                dtype={
+                    field: "float64" if column == DM_FIELD else "object"
+                    for field, column in SALESFORCE_FIELDS.items()
+                },
+                keep_default_na=False,
+                na_values=[""],
+            )
+            for chunk in chunks
+        ]
+        data = pd.concat(frames, ignore_index=True)[list(SALESFORCE_FIELDS)]
+
+        ingest_span.rows = data.shape[0]
+        return normalize_salesforce_data(data.rename(columns=SALESFORCE_FIELDS))
+
+
+def normalize_salesforce_data(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts a DataFrame of raw Salesforce values (columns named as in SALESFORCE_FIELDS)
+    into the report's standard columns
+    """
+    data["CREATED_DATE"] = (
+        pd.to_datetime(data["CREATED_DATE"], utc=True, format="ISO8601")
+        .dt.tz_convert(LA_TIMEZONE)
+        .dt.tz_localize(None)
+        .dt.normalize()
     )
 
-    data.drop(columns=["SF_FCST"])
+    data.insert(
+        data.columns.get_loc("STAGENAME") + 1,
+        "FORECAST_CATEGORY",
+        np.where(data["STAGENAME"].isin(CLOSED_STAGES), "Won", data["SF_FCST"]),
+    )
+    data = data.drop(columns=["SF_FCST"])
 
     data["STAGE_1_DATE"] = pd.to_datetime(
         data["SAO_DATE"], errors="coerce", format="ISO8601"
-    ).dt.date
+    )
 
     return standardize_data(data)
 
@@ -106,10 +406,51 @@ def _float_to_decimal(num) -> Decimal:
     return Decimal(num).quantize(Decimal("1.00"), rounding="ROUND_HALF_EVEN")
 
 
+def _float_to_cents(values: np.ndarray) -> np.ndarray:
+    """
+    Vectorized _float_to_decimal, returning int64 cents.\n
+    Values within float error of a half cent are rounded through Decimal, so ties
+    break on the float's exact value just as ROUND_HALF_EVEN does.
+    """
+    if np.issubdtype(values.dtype, np.integer):
+        return values.astype("int64") * 100
+
+    scaled = values.astype("float64") * 100
+    cents = np.rint(scaled)
+
+    tolerance = np.maximum(1e-6, np.abs(scaled) * 1e-12)
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < tolerance
+    cents[near_half] = [
+        int(_float_to_decimal(float(num)).scaleb(2)) for num in values[near_half]
+    ]
+
+    return cents.astype("int64")
+
+
 def _decimal_to_float(num: Decimal) -> float:
     return float(num)
 
 
+def _as_decimal(dm):
+    """
+    Returns DM values from a cents column as Decimal, leaving Decimal values unchanged
+    """
+    if isinstance(dm, pd.Series):
+        if pd.api.types.is_integer_dtype(dm):
+            return dm.map(cents_to_decimal)
+        return dm
+    if isinstance(dm, (int, np.integer)):
+        return cents_to_decimal(dm)
+    return dm
+
+
+def sum_dm(data: pd.DataFrame) -> Decimal:
+    """
+    Returns total DM of <data> as a Decimal
+    """
+    return _as_decimal(data[DM_FIELD].sum())
+
+
 def _fcst_opps(data: pd.DataFrame, forecast_category: str) -> pd.DataFrame:
     return data[(data["FORECAST_CATEGORY"] == forecast_category)]
 
@@ -123,23 +464,96 @@ def _booked_opps(data: pd.DataFrame) -> pd.DataFrame:
 
 
 def _open_opps(data: pd.DataFrame) -> pd.DataFrame:
-    return data[
-        (data["FORECAST_CATEGORY"] != "Ommitted") & (data["FORECAST_CATEGORY"] != "Won")
-    ]
+    return data[~data["FORECAST_CATEGORY"].isin(["Ommitted", "Won"])]
 
 
-def _top_n_opps(data: pd.DataFrame, number: int = 3) -> list:
-    sorted_data = data.sort_values(by="DM", ascending=False, ignore_index=True)
-    assert sorted_data.shape[0] > 0
-    top_records = []
-    for n in range(0, number):
-        try:
-            top_records.append((sorted_data.at[n, "NAME"], sorted_data.at[n, "DM"]))
-        except KeyError:
-            top_records.append(("", 0))
+EMPTY_OPP = ("", 0)
+
+
+def _top_n_positions(dm: np.ndarray, number: int) -> np.ndarray:
+    """
+    Returns positions of the <number> largest values of <dm>, plus any values tied with
+    the smallest of them, in no particular order
+    """
+    if dm.shape[0] <= number:
+        return np.arange(dm.shape[0])
+    if dm.dtype == object:
+        largest = heapq.nlargest(number, range(dm.shape[0]), key=dm.__getitem__)
+        threshold = dm[largest[-1]]
+    else:
+        threshold = np.partition(dm, dm.shape[0] - number)[dm.shape[0] - number]
+    return np.flatnonzero(dm >= threshold)
+
+
+def _top_n_opps(
+    data: pd.DataFrame, number: int = 3, fill: tuple | None = EMPTY_OPP
+) -> list:
+    """
+    Returns (NAME, DM) of the <number> largest DM opportunities, ties broken by NAME.\n
+    Selection is a partial sort of the DM column; only the top rows are ordered.
+    Lists shorter than <number> are padded with <fill>, unless <fill> is None.
+    """
+    candidates = data.iloc[_top_n_positions(data[DM_FIELD].to_numpy(), number)]
+    top_data = candidates.sort_values(
+        by=[DM_FIELD, "NAME"], ascending=[False, True], kind="stable"
+    ).head(number)
+
+    top_records = [
+        (name, _as_decimal(dm))
+        for name, dm in zip(top_data["NAME"], top_data[DM_FIELD])
+    ]
+    if fill is not None:
+        top_records += [fill] * (number - len(top_records))
     return top_records
 
 
+def top_n_opps_by(
+    data: pd.DataFrame, field: str, number: int = 3, fill: tuple | None = EMPTY_OPP
+) -> dict[str, list]:
+    """
+    Returns _top_n_opps for each value of <field>, e.g. every FORECAST_CATEGORY at once.\n
+    Rows are split into groups in a single pass over <field>.
+    """
+    dm = data[DM_FIELD].to_numpy()
+
+    return {
+        value: _top_n_opps(
+            data.iloc[positions[_top_n_positions(dm[positions], number)]], number, fill
+        )
+        for value, positions in data.groupby(field, sort=False, observed=True).indices.items()
+    }
+
+
+class DateIndex:
+    """
+    Row positions of a datetime64 column sorted by date.\n
+    Answers period filters with two searchsorted lookups and a contiguous slice
+    instead of comparing every row. Null dates are left out of the index.
+    """
+
+    def __init__(self, dates: pd.Series):
+        values = dates.to_numpy(dtype="datetime64[ns]")
+        valid = np.flatnonzero(~np.isnat(values))
+
+        self._order = valid[np.argsort(values[valid], kind="stable")]
+        self._sorted = values[self._order]
+
+    def __len__(self):
+        return self._order.shape[0]
+
+    def positions(self, start_date: dt.date, end_date: dt.date) -> np.ndarray:
+        """
+        Returns row positions dated between start_date and end_date (inclusive), in date order
+        """
+        start = np.searchsorted(self._sorted, _datetime64(start_date), side="left")
+        end = np.searchsorted(self._sorted, _datetime64(end_date), side="right")
+        return self._order[start:end]
+
+
+def _datetime64(date: dt.date) -> np.datetime64:
+    return np.datetime64(date, "ns")
+
+
 def stage_1_in_period(
     data: pd.DataFrame,
     start_date: dt.date,
@@ -147,7 +561,8 @@ def stage_1_in_period(
 ) -> pd.DataFrame:
 
     return data[
-        (data["STAGE_1_DATE"] >= start_date) & (data["STAGE_1_DATE"] <= end_date)
+        (data["STAGE_1_DATE"] >= _datetime64(start_date))
+        & (data["STAGE_1_DATE"] <= _datetime64(end_date))
     ]
 
 
@@ -157,7 +572,10 @@ def closedate_in_period(
     end_date: dt.date,
 ) -> pd.DataFrame:
 
-    return data[(data["CLOSEDATE"] >= start_date) & (data["CLOSEDATE"] <= end_date)]
+    return data[
+        (data["CLOSEDATE"] >= _datetime64(start_date))
+        & (data["CLOSEDATE"] <= _datetime64(end_date))
+    ]
 
 
 def closing_in_period(
@@ -181,31 +599,65 @@ def booked_in_period(
     )
 
 
-def total_in_period(
+def category_in_period(
     data: pd.DataFrame,
     category: Category,
-    metric: Metric,
     start_date: dt.date,
     end_date: dt.date,
-) -> Decimal:
+) -> pd.DataFrame:
 
     match category:
         case Category.STAGE_1:
-            category_data = stage_1_in_period(
+            return stage_1_in_period(
                 data=data, start_date=start_date, end_date=end_date
             )
         case Category.PIPELINE:
-            category_data = closing_in_period(
+            return closing_in_period(
                 data=data, start_date=start_date, end_date=end_date
             )
         case Category.BOOKED:
-            category_data = booked_in_period(
+            return booked_in_period(
+                data=data, start_date=start_date, end_date=end_date
+            )
+        case Category.CLOSING:
+            return closedate_in_period(
                 data=data, start_date=start_date, end_date=end_date
             )
+        case Category.COMMIT:
+            return closedate_in_period(
+                data=_fcst_opps(data, "Commit"),
+                start_date=start_date,
+                end_date=end_date,
+            )
+        case Category.BEST_CASE:
+            return closedate_in_period(
+                data=_fcst_opps(data, "Best Case"),
+                start_date=start_date,
+                end_date=end_date,
+            )
+        case Category.BUSINESS_TERMS:
+            return closedate_in_period(
+                data=_stage_opps(data, "Business Terms"),
+                start_date=start_date,
+                end_date=end_date,
+            )
+
+
+def total_in_period(
+    data: pd.DataFrame,
+    category: Category,
+    metric: Metric,
+    start_date: dt.date,
+    end_date: dt.date,
+) -> Decimal:
+
+    category_data = category_in_period(
+        data=data, category=category, start_date=start_date, end_date=end_date
+    )
 
     match metric:
         case Metric.DM:
-            return category_data["DM"].sum()
+            return sum_dm(category_data)
         case Metric.COUNT:
             return category_data["NAME"].count()
 
@@ -214,19 +666,9 @@ def top_opps_in_period(
     data: pd.DataFrame, category: Category, start_date: dt.date, end_date: dt.date
 ) -> list:
 
-    match category:
-        case Category.STAGE_1:
-            category_data = stage_1_in_period(
-                data=data, start_date=start_date, end_date=end_date
-            )
-        case Category.PIPELINE:
-            category_data = closing_in_period(
-                data=data, start_date=start_date, end_date=end_date
-            )
-        case Category.BOOKED:
-            category_data = booked_in_period(
-                data=data, start_date=start_date, end_date=end_date
-            )
+    category_data = category_in_period(
+        data=data, category=category, start_date=start_date, end_date=end_date
+    )
 
     return _top_n_opps((category_data))
 
@@ -268,17 +710,26 @@ def top_business_terms_in_period(
     return _top_n_opps(data=bt_opps)
 
 
+def split_by(data: pd.DataFrame, field: str) -> dict:
+    """
+    Sums DM by <field>, with each value's share of the total under "PERCENT"
+    and the overall sum under ["DM"]["Total"]
+    """
+    dm_by_field = data[[field, "DM"]].groupby([field], observed=True).sum()
+    dm_by_field["DM"] = _as_decimal(dm_by_field["DM"]).astype(object)
+
+    dm_by_field["PERCENT"] = dm_by_field["DM"] / dm_by_field["DM"].sum()
+    dm_by_field_dict = dm_by_field.to_dict()
+    dm_by_field_dict["DM"]["Total"] = sum_dm(dm_by_field)
+    return dm_by_field_dict
+
+
 def bookings_by_region(
     data: pd.DataFrame, start_date: dt.date, end_date: dt.date
 ) -> dict:
     booked_ytd = booked_in_period(data=data, start_date=start_date, end_date=end_date)
 
-    dm_by_region = booked_ytd[["REGION", "DM"]].groupby(["REGION"]).sum()
-
-    dm_by_region["PERCENT"] = dm_by_region["DM"] / dm_by_region["DM"].sum()
-    dm_by_region_dict = dm_by_region.to_dict()
-    dm_by_region_dict["DM"]["Total"] = dm_by_region["DM"].sum()
-    return dm_by_region_dict
+    return split_by(data=booked_ytd, field="REGION")
 
 
 def bookings_by_comms_vs_identity(
@@ -286,15 +737,7 @@ def bookings_by_comms_vs_identity(
 ) -> dict:
     booked_ytd = booked_in_period(data=data, start_date=start_date, end_date=end_date)
 
-    dm_by_comms_vs_identity = (
-        booked_ytd[["COMMS_VS_IDENTITY", "DM"]].groupby(["COMMS_VS_IDENTITY"]).sum()
-    )
-
-    dm_by_comms_vs_identity["PERCENT"] = (
-        dm_by_comms_vs_identity["DM"] / dm_by_comms_vs_identity["DM"].sum()
-    )
-
-    return dm_by_comms_vs_identity.to_dict()
+    return split_by(data=booked_ytd, field="COMMS_VS_IDENTITY")
 
 
 def calculate_gap_coverage(
@@ -334,6 +777,23 @@ def calculate_gap_coverage(
     return gap_data
 
 
+def add_gap_coverage(fcst_dict: dict, management_call: Decimal) -> dict:
+    """
+    Adds "Management Call" gap data to a FORECAST_CATEGORY split when a management call is set
+    """
+    if management_call > 0:
+        gap_coverage = calculate_gap_coverage(
+            management_call=management_call,
+            won_dm=fcst_dict["DM"]["Won"],
+            commit_dm=fcst_dict["DM"]["Commit"],
+            bc_dm=fcst_dict["DM"]["Best Case"],
+            pipeline_dm=fcst_dict["DM"]["Pipeline"],
+        )
+        fcst_dict["Management Call"] = gap_coverage
+
+    return fcst_dict
+
+
 def pipeline_by_forecast(
     data: pd.DataFrame, management_call: Decimal, start_date: dt.date, end_date: dt.date
 ) -> dict[str:dict]:
@@ -343,23 +803,9 @@ def pipeline_by_forecast(
         end_date=end_date,
     )
 
-    pipe_by_forecast_category: pd.DataFrame = (
-        closing_in_q[["FORECAST_CATEGORY", "DM"]].groupby(["FORECAST_CATEGORY"]).sum()
-    )
-
-    fcst_dict = pipe_by_forecast_category.to_dict()
-
-    if management_call > 0:
-        gap_coverage = calculate_gap_coverage(
-            management_call=management_call,
-            won_dm=pipe_by_forecast_category.at["Won", "DM"],
-            commit_dm=pipe_by_forecast_category.at["Commit", "DM"],
-            bc_dm=pipe_by_forecast_category.at["Best Case", "DM"],
-            pipeline_dm=pipe_by_forecast_category.at["Pipeline", "DM"],
-        )
-        fcst_dict["Management Call"] = gap_coverage
+    fcst_dict = split_by(data=closing_in_q, field="FORECAST_CATEGORY")
 
-    return fcst_dict
+    return add_gap_coverage(fcst_dict=fcst_dict, management_call=management_call)
 
 
 def pipeline_by_comms_vs_identity(
@@ -367,15 +813,7 @@ def pipeline_by_comms_vs_identity(
 ) -> dict:
     created_ytd = stage_1_in_period(data=data, start_date=start_date, end_date=end_date)
 
-    dm_by_comms_vs_identity = (
-        created_ytd[["COMMS_VS_IDENTITY", "DM"]].groupby(["COMMS_VS_IDENTITY"]).sum()
-    )
-
-    dm_by_comms_vs_identity["PERCENT"] = (
-        dm_by_comms_vs_identity["DM"] / dm_by_comms_vs_identity["DM"].sum()
-    )
-
-    return dm_by_comms_vs_identity.to_dict()
+    return split_by(data=created_ytd, field="COMMS_VS_IDENTITY")
 
 
 def pipeline_by_region(
@@ -383,10 +821,4 @@ def pipeline_by_region(
 ) -> dict:
     created_ytd = stage_1_in_period(data=data, start_date=start_date, end_date=end_date)
 
-    dm_by_region = created_ytd[["REGION", "DM"]].groupby(["REGION"]).sum()
-
-    dm_by_region["PERCENT"] = dm_by_region["DM"] / dm_by_region["DM"].sum()
-
-    dm_by_region_dict = dm_by_region.to_dict()
-
-    return dm_by_region_dict
+    return split_by(data=created_ytd, field="REGION")
@@ -1,23 +1,76 @@
 import datetime as dt
+import numpy as np
 
 
 class DateQuarter:
-    _year: int = 0
-    _quarter: int = 0
+    """
+    A calendar quarter. Instances are immutable and interned, so DateQuarter(2024, 3)
+    always returns the same object, and can be used as dict keys and in sets.\n
+    Quarter codes (year * 4 + quarter - 1) give an integer key for vectorized bucketing,
+    see from_dates() and from_code().
+    """
 
-    def __init__(self, year: int, quarter: int):
-        year = year + (quarter - 1) // 4
-        quarter = (quarter - 1) % 4 + 1
+    __slots__ = ("_year", "_quarter", "_start_date", "_end_date")
 
-        self._year = year
-        self._quarter = quarter
+    _instances: dict[tuple[int, int], "DateQuarter"] = {}
 
+    def __new__(cls, year: int, quarter: int):
+        year = year + (quarter - 1) // 4
+        quarter = (quarter - 1) % 4 + 1
 
+        instance = cls._instances.get((year, quarter))
+        if instance is None:
+            start_date = dt.date(year=year, month=(quarter - 1) * 3 + 1, day=1)
+            if quarter == 4:
+                end_date = dt.date(year=year, month=12, day=31)
+            else:
+                end_date = dt.date(
+                    year=year, month=quarter * 3 + 1, day=1
+                ) - dt.timedelta(days=1)
+
+            instance = super().__new__(cls)
+            # __setattr__ refuses every assignment, so the fields are set directly
+            object.__setattr__(instance, "_year", year)
+            object.__setattr__(instance, "_quarter", quarter)
+            object.__setattr__(instance, "_start_date", start_date)
+            object.__setattr__(instance, "_end_date", end_date)
+            instance = cls._instances.setdefault((year, quarter), instance)
+        return instance
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"DateQuarter is immutable, cannot set {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"DateQuarter is immutable, cannot delete {name}")
+
+    def __reduce__(self):
+        return (self.__class__, (self._year, self._quarter))
+
+    def __hash__(self):
+        return hash((self._year, self._quarter))
 
     @classmethod
     def from_date(cls, date: dt.date):
         return cls(date.year, ((date.month - 1) // 3) + 1)
 
+    @classmethod
+    def from_code(cls, code: int):
+        """
+        Return the DateQuarter for a quarter code, see code()
+        """
+        return cls(int(code) // 4, int(code) % 4 + 1)
+
+    @staticmethod
+    def from_dates(dates) -> np.ndarray:
+        """
+        Return an int64 array of quarter codes for an array or Series of datetime64 values.\n
+        Missing dates (NaT) map to -1
+        """
+        months = np.asarray(dates, dtype="datetime64[M]")
+        codes = months.astype(np.int64) // 3 + 1970 * 4
+        codes[np.isnat(months)] = -1
+        return codes
+
     def __repr__(self):
         return f"<DateQuarter-Q{self._quarter}-{self._year}>"
 
@@ -30,7 +83,7 @@ class DateQuarter:
     def __eq__(self, other):
         if isinstance(other, DateQuarter):
             return self._year == other._year and self._quarter == other._quarter
-        raise ArithmeticError(f"Cannot determine equlity with type {type(other)}")
+        return NotImplemented
 
     def __gt__(self, other):
         if isinstance(other, dt.date):
@@ -86,17 +139,23 @@ class DateQuarter:
     def quarter(self) -> int:
         return self._quarter
 
+    def code(self) -> int:
+        """
+        Return the quarter code, year * 4 + quarter - 1, which sorts in quarter order
+        """
+        return self._year * 4 + self._quarter - 1
+
     def start_date(self) -> dt.date:
-        return dt.date(year=self._year, month=(self._quarter - 1) * 3 + 1, day=1)
+        return self._start_date
 
     def end_date(self) -> dt.date:
-        return (self + 1).start_date() - dt.timedelta(days=1)
+        return self._end_date
 
     def days_in_quarter(self) -> int:
         """
         Return total number of days in quarter
         """
-        return ((self + 1).start_date() - self.start_date()).days
+        return (self._end_date - self._start_date).days + 1
 
     def days_active(self, start_or_end_date: dt.date, is_start_date: bool = False) -> int:
         """
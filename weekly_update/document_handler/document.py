@@ -0,0 +1,85 @@
+from typing import Iterator, NamedTuple
+
+HEADING = "heading"
+BULLET = "bullet"
+PARAGRAPH = "paragraph"
+DOCUMENT = "document"
+
+
+class Block(NamedTuple):
+    """
+    One node of a parsed report.\n
+    kind is DOCUMENT, HEADING ("#" = level 1, "##" = level 2), BULLET (">" = level 1
+    to ">>>>" = level 4) or PARAGRAPH (any other line, including blank ones).
+    Blocks nest under the closest preceding heading or lower-level bullet, so
+    walking the tree depth-first gives back the report lines in order.
+    """
+
+    kind: str
+    level: int
+    text: str
+    children: list["Block"]
+
+    def marker(self) -> str:
+        match self.kind:
+            case "heading":
+                return "#" * self.level
+            case "bullet":
+                return ">" * self.level
+        return ""
+
+    def walk(self) -> Iterator["Block"]:
+        """
+        Yields every block below this one, depth-first in report order
+        """
+        for child in self.children:
+            yield child
+            yield from child.walk()
+
+
+def _parse_line(line: str) -> tuple[str, str]:
+    """
+    Splits a report line into its markup marker ("#", ">>", ...) and text
+    """
+    line = line.removesuffix("\n")
+    if line.startswith(">") or line.startswith("#"):
+        marker, *text = line.split(sep=None, maxsplit=1)
+        return marker, text[0] if text else ""
+    return "", line.strip()
+
+
+def _block(marker: str, text: str) -> Block:
+    if marker and set(marker) == {"#"}:
+        return Block(HEADING, len(marker), text, [])
+    if marker and set(marker) == {">"}:
+        return Block(BULLET, len(marker), text, [])
+    return Block(PARAGRAPH, 0, text, [])
+
+
+def parse_report(weekly_update: str, title: str = "") -> Block:
+    """
+    Parses the rendered template markup once into a DOCUMENT block tree
+    """
+    document = Block(DOCUMENT, 0, title, [])
+    headings = [document]
+    bullets: list[Block] = []
+
+    for line in weekly_update.splitlines():
+        block = _block(*_parse_line(line))
+        match block.kind:
+            case "heading":
+                while len(headings) > 1 and headings[-1].level >= block.level:
+                    headings.pop()
+                headings[-1].children.append(block)
+                headings.append(block)
+                bullets = []
+            case "bullet":
+                while bullets and bullets[-1].level >= block.level:
+                    bullets.pop()
+                (bullets[-1] if bullets else headings[-1]).children.append(block)
+                bullets.append(block)
+            case _:
+                headings[-1].children.append(block)
+                bullets = []
+
+    return document
@@ -1,51 +1,90 @@
+import copy
 import logging
+import threading
 
 from docx import Document
 from docx.shared import Pt
-from datetime import date
-from os import path
+from docx.text.paragraph import Paragraph
+from functools import cache
+from typing import IO
 
+from .document import Block
 
-def write_to_docx(weekly_update: str, week_start_date: str, current_directory: str):
-    log = logging.getLogger()
-    log.debug("Writing to .docx file")
-    template_path = path.join(current_directory,"document_handler/template.docx")
+LINE_STYLES = {
+    "#": "Weekly Update Header",
+    "##": "Weekly Update Sub Heading",
+    ">": "List Bullet",
+    ">>": "List Bullet 2",
+    ">>>": "List Bullet 3",
+    ">>>>": "List Bullet 4",
+}
+DEFAULT_STYLE = "Normal"
 
-    summary_file = Document(template_path)
 
-    summary_file.add_paragraph(
-        "Weekly Update: {}".format(week_start_date), style="Weekly Update Header"
-    )
+class DocxRenderer:
+    """
+    Renders reports into copies of one .docx template.\n
+    The template is parsed once. Each style gets a zero-spacing paragraph prototype
+    that is cloned per line, so styles are looked up once rather than per paragraph.
+    Paragraphs added by a render are removed again after saving, so the parsed
+    template is reused; renders are serialized with a lock.
+    """
 
-    for line in weekly_update.splitlines():
-        line = line.removesuffix("\n")
-        if line.startswith(">") or line.startswith("#"):
-            line_data = line.split(sep=None, maxsplit=1)
+    def __init__(self, template_path: str):
+        self._document = Document(template_path)
+        self._body = self._document.element.body
+        self._template_elements = list(self._body)
+        self._prototypes = {}
+        self._lock = threading.Lock()
+
+    def _prototype(self, style: str):
+        if style not in self._prototypes:
+            paragraph = self._document.add_paragraph(style=self._document.styles[style])
+            paragraph.paragraph_format.space_before = Pt(0)
+            paragraph.paragraph_format.space_after = Pt(0)
+            self._body.remove(paragraph._p)
+            self._prototypes[style] = paragraph._p
+        return self._prototypes[style]
+
+    def _add_paragraph(self, text: str, style: str, spacing: bool = False) -> None:
+        if spacing:
+            paragraph = self._document.add_paragraph(style=self._document.styles[style])
         else:
-            line_data = ["", line.strip()]
-
-        match line_data[0]:
-            case "#":
-                style = "Weekly Update Header"
-            case "##":
-                style = "Weekly Update Sub Heading"
-            case ">":
-                style = "List Bullet"
-            case ">>":
-                style = "List Bullet 2"
-            case ">>>":
-                style = "List Bullet 3"
-            case ">>>>":
-                style = "List Bullet 4"
-            case _:
-                style = "Normal"
-
-        p = summary_file.add_paragraph(line_data[1], style=style)
-        p.paragraph_format.space_before = Pt(0)
-        p.paragraph_format.space_after = Pt(0)
-
-    title = "Weekly_Update_{}.docx".format(week_start_date)
-
-    summary_file.save(title)
-
-    print("\n\nSummary file saved to {}\n\n".format(path.join(path.abspath(path.curdir), title)))
+            element = copy.deepcopy(self._prototype(style))
+            self._body._insert_p(element)
+            paragraph = Paragraph(element, self._document._body)
+        if text:
+            paragraph.add_run(text)
+
+    def render_document(self, document: Block, output: str | IO[bytes]) -> None:
+        """
+        Writes a parse_report tree under a "Weekly Update: <document.text>" header
+        to <output>, a file path or a binary file object such as io.BytesIO
+        """
+        with self._lock:
+            try:
+                self._add_paragraph(
+                    "Weekly Update: {}".format(document.text),
+                    LINE_STYLES["#"],
+                    spacing=True,
+                )
+                for block in document.walk():
+                    self._add_paragraph(
+                        block.text, LINE_STYLES.get(block.marker(), DEFAULT_STYLE)
+                    )
+
+                self._document.save(output)
+            finally:
+                for element in list(self._body):
+                    if element not in self._template_elements:
+                        self._body.remove(element)
+
+
+@cache
+def docx_renderer(template_path: str) -> DocxRenderer:
+    """
+    Returns the shared DocxRenderer for <template_path>, parsing it on first use
+    """
+    logging.getLogger().debug("Loading docx template {}".format(template_path))
+    return DocxRenderer(template_path)
+
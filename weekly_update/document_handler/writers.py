@@ -0,0 +1,181 @@
+import html
+import json
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from os import path
+from typing import IO, Callable, NamedTuple
+
+from instrumentation import span
+
+from .document import Block
+from .docx_handler import docx_renderer
+
+log = logging.getLogger(__name__)
+
+_DOCX_TEMPLATE = path.join(path.dirname(path.realpath(__file__)), "template.docx")
+
+
+class Writer(NamedTuple):
+    """
+    An output format: <write>(document, values, output) serializes a parse_report
+    tree and/or the metric <values> to <output>, a file path or file object
+    """
+
+    extension: str
+    write: Callable[[Block, dict, str | IO], None]
+
+
+def _open(output: str | IO, mode: str):
+    """
+    Opens <output> when it is a path; file objects are used as-is and left open
+    """
+    if isinstance(output, str):
+        return open(output, mode=mode, encoding="utf-8")
+    return nullcontext(output)
+
+
+def write_docx(document: Block, values: dict, output: str | IO[bytes]) -> None:
+    docx_renderer(_DOCX_TEMPLATE).render_document(document, output)
+
+
+def to_markdown(document: Block) -> str:
+    lines = ["# Weekly Update: {}".format(document.text), ""]
+    for block in document.walk():
+        match block.kind:
+            case "heading":
+                lines.append("{} {}".format("#" * (block.level + 1), block.text))
+            case "bullet":
+                lines.append("{}- {}".format("  " * (block.level - 1), block.text))
+            case _:
+                lines.append(block.text)
+    return "\n".join(lines) + "\n"
+
+
+def write_markdown(document: Block, values: dict, output: str | IO[str]) -> None:
+    with _open(output, "wt") as markdown_file:
+        markdown_file.write(to_markdown(document))
+
+
+def _html_blocks(blocks: list[Block]) -> list[str]:
+    parts = []
+    in_list = False
+    for block in blocks:
+        if block.kind == "bullet" and not in_list:
+            parts.append("<ul>")
+            in_list = True
+        elif block.kind != "bullet" and in_list:
+            parts.append("</ul>")
+            in_list = False
+
+        text = html.escape(block.text)
+        match block.kind:
+            case "heading":
+                parts.append("<h{0}>{1}</h{0}>".format(block.level + 1, text))
+                parts.extend(_html_blocks(block.children))
+            case "bullet":
+                parts.append("<li>{}".format(text))
+                parts.extend(_html_blocks(block.children))
+                parts.append("</li>")
+            case _:
+                if block.text:
+                    parts.append("<p>{}</p>".format(text))
+    if in_list:
+        parts.append("</ul>")
+    return parts
+
+
+def to_html(document: Block) -> str:
+    """
+    Returns the report as a self-contained HTML fragment for an email body
+    """
+    title = html.escape("Weekly Update: {}".format(document.text))
+    return "\n".join(
+        ["<div>", "<h1>{}</h1>".format(title), *_html_blocks(document.children), "</div>"]
+    ) + "\n"
+
+
+def write_html(document: Block, values: dict, output: str | IO[str]) -> None:
+    with _open(output, "wt") as html_file:
+        html_file.write(to_html(document))
+
+
+def write_json(document: Block, values: dict, output: str | IO[str]) -> None:
+    """
+    Writes the metric <values> the report was rendered from, keyed by template field
+    """
+    with _open(output, "wt") as json_file:
+        json.dump(
+            {"title": document.text, "values": values},
+            json_file,
+            default=str,
+            indent=2,
+            sort_keys=True,
+        )
+
+
+WRITERS: dict[str, Writer] = {
+    "docx": Writer(".docx", write_docx),
+    "md": Writer(".md", write_markdown),
+    "html": Writer(".html", write_html),
+    "json": Writer(".json", write_json),
+}
+
+
+def register_writer(name: str, extension: str, write: Callable) -> None:
+    """
+    Adds or replaces the output format <name>, written to files ending in <extension>
+    """
+    WRITERS[name] = Writer(extension, write)
+
+
+def _check_formats(formats) -> None:
+    unknown = set(formats) - set(WRITERS)
+    if unknown:
+        raise ValueError(
+            "Unknown output format {}, expected one of {}".format(
+                ", ".join(sorted(unknown)), ", ".join(WRITERS)
+            )
+        )
+
+
+def _write(name: str, document: Block, values: dict, output: str | IO) -> str | IO:
+    with span("write.{}".format(name)):
+        WRITERS[name].write(document, values, output)
+    return output
+
+
+def write_outputs(
+    document: Block,
+    values: dict,
+    outputs: dict[str, str | IO],
+    max_workers: int | None = None,
+) -> dict[str, str | IO]:
+    """
+    Writes <document> in every format of <outputs> ({format name: path or file object})
+    concurrently on a thread pool. Returns <outputs> once all writers have finished.\n
+    Raises ValueError for a format that is not in WRITERS.
+    """
+    _check_formats(outputs)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(outputs) or 1) as executor:
+        futures = [
+            executor.submit(_write, name, document, values, output)
+            for name, output in outputs.items()
+        ]
+        for future in futures:
+            future.result()
+
+    for output in outputs.values():
+        if isinstance(output, str):
+            log.debug("Saved {}".format(path.abspath(output)))
+    return outputs
+
+
+def output_paths(formats: list[str], file_stem: str) -> dict[str, str]:
+    """
+    Returns {format: <file_stem><extension>} for each of <formats>
+    """
+    _check_formats(formats)
+    return {name: file_stem + WRITERS[name].extension for name in formats}
@@ -0,0 +1 @@
+from .spans import TRACER, Span, Tracer, span, traced
\ No newline at end of file
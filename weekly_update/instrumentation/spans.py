@@ -0,0 +1,189 @@
+import cProfile
+import json
+import logging
+import os
+import threading
+import tracemalloc
+
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from typing import Callable, Iterator
+
+log = logging.getLogger(__name__)
+
+
+class Span:
+    """
+    One timed stage of the report pipeline.\n
+    <rows> is set by the code inside the span when it knows how many rows it handled.
+    <memory> (net bytes allocated) and <peak_memory> are only measured while the
+    tracer is profiling.
+    """
+
+    __slots__ = (
+        "name", "start", "duration", "rows", "memory", "peak_memory", "depth", "thread"
+    )
+
+    def __init__(self, name: str, start: float, depth: int):
+        self.name = name
+        self.start = start
+        self.depth = depth
+        self.thread = threading.get_ident()
+        self.duration: float | None = None
+        self.rows: int | None = None
+        self.memory: int | None = None
+        self.peak_memory: int | None = None
+
+    def __repr__(self):
+        return f"<Span-{self.name}-{self.duration}>"
+
+
+class Tracer:
+    """
+    Collects Spans for one run. Spans are always timed, which costs a perf_counter
+    call each; start_profiling() adds memory tracking and cProfile.
+    """
+
+    def __init__(self):
+        self.spans: list[Span] = []
+        self._origin = perf_counter()
+        self._local = threading.local()
+        self._profiler: cProfile.Profile | None = None
+
+    @property
+    def profiling(self) -> bool:
+        return self._profiler is not None
+
+    def _stack(self) -> list[list]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        """
+        Times the block as a Span named <name>, nested under any open span
+        """
+        stack = self._stack()
+        span = Span(name, perf_counter() - self._origin, depth=len(stack))
+        # Each stack entry is [span, memory at start, highest peak of finished children]
+        entry = [span, 0, 0]
+        if tracemalloc.is_tracing():
+            entry[1], peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1][2] = max(stack[-1][2], peak)
+            tracemalloc.reset_peak()
+        stack.append(entry)
+        try:
+            yield span
+        finally:
+            stack.pop()
+            span.duration = perf_counter() - self._origin - span.start
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                span.memory = current - entry[1]
+                span.peak_memory = max(peak, entry[2])
+                if stack:
+                    stack[-1][2] = max(stack[-1][2], span.peak_memory)
+            self.spans.append(span)
+            log.debug(
+                "{} took {}ms{}".format(
+                    name,
+                    round(span.duration * 1000, 2),
+                    "" if span.rows is None else " for {} rows".format(span.rows),
+                )
+            )
+
+    def start_profiling(self) -> None:
+        tracemalloc.start()
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def stop_profiling(self) -> None:
+        if self._profiler is not None:
+            self._profiler.disable()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def trace_events(self) -> list[dict]:
+        """
+        Returns the spans in Chrome trace event format (chrome://tracing, Perfetto)
+        """
+        return [
+            {
+                "name": span.name,
+                "ph": "X",
+                "ts": round(span.start * 1_000_000),
+                "dur": round((span.duration or 0) * 1_000_000),
+                "pid": os.getpid(),
+                "tid": span.thread,
+                "args": {
+                    key: value
+                    for key, value in (
+                        ("rows", span.rows),
+                        ("memory", span.memory),
+                        ("peak_memory", span.peak_memory),
+                    )
+                    if value is not None
+                },
+            }
+            for span in self.spans
+        ]
+
+    def write_profile(self, file_path: str) -> list[str]:
+        """
+        Writes the span trace to <file_path>.json and, when profiling, the cProfile
+        stats to <file_path>.prof. Returns the paths written.
+        """
+        written = [f"{file_path}.json"]
+        with open(written[0], mode="wt") as trace_file:
+            json.dump({"traceEvents": self.trace_events()}, trace_file)
+        if self._profiler is not None:
+            written.append(f"{file_path}.prof")
+            self._profiler.dump_stats(written[1])
+        return written
+
+    def summary(self, depth: int = 0) -> list[str]:
+        """
+        Returns one line per span at or above <depth> levels of nesting, in start order
+        """
+        lines = []
+        for span in sorted(self.spans, key=lambda span: span.start):
+            if span.depth > depth:
+                continue
+            line = "{}{}: {}ms".format(
+                "  " * span.depth, span.name, round(span.duration * 1000, 2)
+            )
+            if span.rows is not None:
+                line += ", {} rows".format(span.rows)
+            if span.peak_memory is not None:
+                line += ", peak {:.1f}MB".format(span.peak_memory / 1_048_576)
+            lines.append(line)
+        return lines
+
+
+TRACER = Tracer()
+
+
+def span(name: str):
+    """
+    Times a block as a span of the process-wide TRACER, e.g. with span("query"):
+    """
+    return TRACER.span(name)
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator that runs each call of the function inside span(<name>)
+    """
+
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -3,20 +3,33 @@
 import typer
 import datetime as dt
 import logging
-import pandas as pd
 
 from decimal import Decimal
 from dotenv import load_dotenv
 from os import path, environ
 from time import time
-from string import Template
-
-from data.query import run_salesforce_query, SALESFORCE_QUERY
-from data.transformations import salesforce_dict_to_dataframe
-from data.weekly_update import generate_date_inputs, generate_weekly_update_dict
+from typing import List, Optional
+
+from data.loading import load_opportunities
+from data.transformations import save_to_file
+from data.targets import (
+    DEFAULT_MONTHLY_PIPE_TARGET,
+    DEFAULT_QUARTERLY_BOOKING_TARGET,
+    load_config,
+    select_template,
+    targets_for_date,
+    to_decimal,
+)
+from data.date_values import ReportCalendar
+from data.template import compile_template
+from data.weekly_update import generate_weekly_update_dict
 
 from document_handler.terminal_handler import print_to_terminal
-from document_handler.docx_handler import write_to_docx
+from document_handler.document import parse_report
+from document_handler.writers import output_paths, write_outputs
+from instrumentation import TRACER, span
+
+log = logging.getLogger(__name__)
 
 
 def main(
@@ -24,10 +37,30 @@ def main(
     skip_management_call: bool = False,
     verbose: bool = False,
     save_to_docx: bool = True,
-    debug: bool = False
+    debug: bool = False,
+    use_snapshot: bool = False,
+    offline: bool = False,
+    config: str = "config.toml",
+    management_call: Optional[float] = None,
+    quarterly_target: Optional[float] = None,
+    monthly_pipe_target: Optional[float] = None,
+    non_interactive: bool = False,
+    profile: bool = False,
+    output_format: Optional[List[str]] = typer.Option(None),
+    input_path: Optional[str] = typer.Option(None, "--input"),
+    export_frame: Optional[str] = None,
 ):
     """
     Generates weekly sales update text or .docx file for the current week.\n
+    Management call and targets come from --management-call/--quarterly-target/--monthly-pipe-target,
+    then the --config TOML file (relative to this directory), then a prompt.\n
+    --non-interactive never prompts: unset targets use their defaults and an unset management call skips the management call section.\n
+    --use-snapshot keeps a local copy of the opportunity data and only fetches records changed since the last run.\n
+    --offline builds the report from the local snapshot without querying Salesforce.\n
+    --input reads the opportunities from a CSV or Parquet export of the report data (DM in dollars, or in cents as a DM_CENTS column), or an --export-frame file, instead of Salesforce.\n
+    --export-frame saves the loaded opportunities for later --input runs, as a memory-mappable Arrow file (.arrow/.feather) or as .csv/.parquet with DM as cents in a DM_CENTS column.\n
+    --output-format (repeatable: docx, md, html, json) writes the report in more formats alongside the .docx, concurrently.\n
+    --profile writes a JSON span trace (with row counts and memory) and cProfile stats to Profile_<date>.json/.prof.\n
     """
 
     logging.basicConfig(
@@ -36,22 +69,19 @@ def main(
         datefmt="%H:%M:%S",
         format="%(asctime)s %(levelname)s: %(message)s",
     )
-    
-    log = logging.getLogger(__name__)
 
     if debug:
         log.setLevel(logging.DEBUG)
 
     log.info("Started")
-    start = time()
 
     _CURRENT_DIRECTORY = path.dirname(path.realpath(__file__))
     log.debug("Running from '{}'".format(_CURRENT_DIRECTORY))
 
     load_dotenv(path.join(_CURRENT_DIRECTORY, ".env"), encoding="utf-8", override=True)
-    _ca_bundle_path = environ[
-        "REQUESTS_CA_BUNDLE"
-    ]  # explicitly load CA Bundle Path from env
+    if not (input_path or offline):
+        # explicitly load CA Bundle Path from env; only Salesforce queries need it
+        _ca_bundle_path = environ["REQUESTS_CA_BUNDLE"]
 
     try:
         input_date = dt.date.fromisoformat(date_override)
@@ -65,72 +95,123 @@ def main(
     date_fmt_long = "%A, %B %-d"
     date_fmt_short = "%d%b%y"
 
-    date_values = generate_date_inputs(date=input_date)
+    calendar = ReportCalendar.for_date(input_date)
 
     if verbose:
         print(
             "\n\nGenerating weekly report for week of {} - {}".format(
-                date_values["date"]["cw_start_date"].strftime(date_fmt_long),
-                date_values["date"]["cw_end_date"].strftime(date_fmt_long),
+                calendar.cw.start_date.strftime(date_fmt_long),
+                calendar.cw.end_date.strftime(date_fmt_long),
             )
         )
 
-    management_call = Decimal(0)
+    targets = targets_for_date(
+        config=load_config(path.join(_CURRENT_DIRECTORY, config)),
+        date=input_date,
+        management_call=to_decimal(management_call),
+        quarterly_booking_target=to_decimal(quarterly_target),
+        monthly_pipe_target=to_decimal(monthly_pipe_target),
+    )
+
+    if not non_interactive:
+        if targets.management_call is None and not skip_management_call:
+            targets = targets._replace(
+                management_call=typer.prompt(
+                    "\n\nPlease enter Management Call", type=Decimal
+                )
+            )
 
-    if skip_management_call:
-        template_name = "default_no_mgmt_call.txt"
-    else:
-        management_call = typer.prompt("\n\nPlease enter Management Call", type=Decimal)
-        template_name = "default.txt"
+        if targets.quarterly_booking_target is None:
+            targets = targets._replace(
+                quarterly_booking_target=typer.prompt(
+                    "\n\nPlease enter Quarterly DM Target",
+                    type=Decimal,
+                    default=DEFAULT_QUARTERLY_BOOKING_TARGET,
+                    show_default=True,
+                )
+            )
 
-    quarterly_booking_target = typer.prompt(
-        "\n\nPlease enter Quarterly DM Target",
-        type=Decimal,
-        default=Decimal(1_100_000),
-        show_default=True,
-    )
+        if targets.monthly_pipe_target is None:
+            targets = targets._replace(
+                monthly_pipe_target=typer.prompt(
+                    "\n\nPlease enter current month pipe gen target",
+                    type=Decimal,
+                    default=DEFAULT_MONTHLY_PIPE_TARGET,
+                    show_default=True,
+                )
+            )
+    targets = targets.with_defaults()
 
-    month_pipeline_target = typer.prompt(
-        "\n\nPlease enter current month pipe gen target",
-        type=Decimal,
-        default=Decimal(861326),
-        show_default=True,
+    management_call, template_name = select_template(
+        None if skip_management_call else targets.management_call
     )
+    quarterly_booking_target = targets.quarterly_booking_target
+    month_pipeline_target = targets.monthly_pipe_target
+
+    start = time()
+    if profile:
+        TRACER.start_profiling()
 
-    min_date = date_values["quarter"]["cq_minus_4"].start_date().isoformat()
+    min_date = calendar.cq_minus(4).start_date().isoformat()
 
-    salesforce_query = SALESFORCE_QUERY.substitute(
-        {"MIN_DATE": min_date, "MIN_DATETIME": f"{min_date}T00:00:00.000Z"}
-    )
-    raw_data = run_salesforce_query(query=salesforce_query)
-    data: pd.DataFrame = salesforce_dict_to_dataframe(raw_data=raw_data)
-
-    template_data = generate_weekly_update_dict(
-        data=data,
-        management_call=management_call,
-        monthly_pipe_target=month_pipeline_target,
-        quarterly_booking_target=quarterly_booking_target,
+    data = load_opportunities(
+        min_date=min_date,
+        current_directory=_CURRENT_DIRECTORY,
+        use_snapshot=use_snapshot,
+        offline=offline,
+        input_path=input_path,
     )
+    if export_frame:
+        from data.arrow_frame import is_frame_file, write_frame
 
-    template_path = path.join(_CURRENT_DIRECTORY, "templates", template_name)
-    with open(template_path, mode="rt") as template_file:
-        log.debug("Loaded template from {}".format(template_path))
-        template = Template(template_file.read())
+        saved = (write_frame if is_frame_file(export_frame) else save_to_file)(
+            data, export_frame
+        )
+        log.info("Frame saved to {}".format(path.abspath(saved)))
+
+    template = compile_template(
+        path.join(_CURRENT_DIRECTORY, "templates", template_name)
+    )
+    with span("metrics"):
+        template_data = generate_weekly_update_dict(
+            data=data,
+            management_call=management_call,
+            monthly_pipe_target=month_pipeline_target,
+            quarterly_booking_target=quarterly_booking_target,
+            for_date=input_date,
+            calendar=calendar,
+            fields=template.fields,
+        )
 
-        weekly_update = template.safe_substitute(template_data)
+    weekly_update = template.render(template_data)
 
     if verbose:
         print_to_terminal(
             weekly_update, week_start_date=input_date.strftime(date_fmt_long)
         )
 
-    if save_to_docx:
-        write_to_docx(
-            weekly_update,
-            week_start_date=dt.date.today().strftime(date_fmt_short),
-            current_directory=_CURRENT_DIRECTORY,
+    formats = (["docx"] if save_to_docx else []) + (output_format or [])
+    formats = list(dict.fromkeys(formats))
+    if formats:
+        file_date = dt.date.today().strftime(date_fmt_short)
+        written = write_outputs(
+            parse_report(weekly_update, title=file_date),
+            template_data,
+            output_paths(formats, "Weekly_Update_{}".format(file_date)),
         )
-    log.info("Completed in {}ms".format(round(time()-start,2)))
+        for output in written.values():
+            print("\n\nSummary file saved to {}\n\n".format(path.abspath(output)))
+    log.info("Completed in {}ms".format(round((time() - start) * 1000, 2)))
+
+    for line in TRACER.summary(depth=1):
+        log.debug(line)
+
+    if profile:
+        TRACER.stop_profiling()
+        for written in TRACER.write_profile(
+            "Profile_{}".format(input_date.strftime(date_fmt_short))
+        ):
+            log.info("Profile saved to {}".format(path.abspath(written)))
 
 if __name__ == "__main__":
     typer.run(main)
@@ -0,0 +1,6 @@
+import sys
+
+from os import path
+
+# The app runs from weekly_update/, which its imports (data., datequarter., ...) assume
+sys.path.insert(0, path.dirname(path.dirname(path.realpath(__file__))))
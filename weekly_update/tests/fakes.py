@@ -0,0 +1,223 @@
+import csv
+import datetime as dt
+import io
+import json
+import re
+
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+from requests.adapters import BaseAdapter
+from simple_salesforce import Salesforce
+
+INSTANCE_URL = "https://fake.salesforce.test"
+LOGIN_URL = "https://login.salesforce.com"
+
+_LOGIN_RESPONSE = """<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">
+<soapenv:Body><loginResponse><result>
+<serverUrl>{}/services/Soap/u/59.0/00D000000000001</serverUrl>
+<sessionId>{}</sessionId>
+</result></loginResponse></soapenv:Body></soapenv:Envelope>"""
+
+
+def opportunity(index: int, **fields) -> dict:
+    """
+    Returns one server-side Opportunity record, with <fields> overriding the defaults
+    """
+    record = {
+        "Id": f"006{index:015d}",
+        "SystemModstamp": "2024-05-01T12:00:00.000+0000",
+        "IsDeleted": False,
+        "IsSalesRecordType__c": True,
+        "Name": f"Opp {index}",
+        "StageName": "Proposal",
+        "ForecastCategoryName": "Best Case",
+        "Comms_vs_Identity__c": "Identity",
+        "Sales_Team_Region__c": "EMEA",
+        "CloseDate": "2024-05-15",
+        "Amount_Direct_Margin__c": 1000.0 + index,
+        "CreatedDate": "2024-01-10T18:30:00.000+0000",
+        "SAO_Date__c": "2024-01-20",
+    }
+    record.update(fields)
+    return record
+
+
+def _timestamp(value: str) -> dt.datetime:
+    return dt.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _csv_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+class FakeSalesforceServer(BaseAdapter):
+    """
+    In-process stand-in for the Salesforce REST query and Bulk API 2.0 query
+    endpoints, mounted on a requests session for INSTANCE_URL.\n
+    Evaluates the filters SALESFORCE_QUERY and SNAPSHOT_DELTA_QUERY use against
+    <records>, and keeps every request path in <requests>.\n
+    Also answers SOAP logins at LOGIN_URL with a new session id; data requests with
+    a session id not in <sessions> get a 401 INVALID_SESSION_ID.
+    """
+
+    def __init__(self, records: list[dict], page_size: int = 2_000, chunk_size: int = 50_000):
+        super().__init__()
+        self.records = records
+        self.page_size = page_size
+        self.chunk_size = chunk_size
+        self.requests: list[str] = []
+        self._cursors: dict[str, list[dict]] = {}
+        self._jobs: dict[str, tuple[list[str], list[dict]]] = {}
+        self.sessions = {"fake-session"}
+        self.logins = 0
+
+    def mount(self, http_session: requests.Session) -> requests.Session:
+        http_session.mount(INSTANCE_URL, self)
+        http_session.mount(LOGIN_URL, self)
+        return http_session
+
+    def session(self) -> Salesforce:
+        return Salesforce(
+            instance_url=INSTANCE_URL,
+            session_id="fake-session",
+            session=self.mount(requests.Session()),
+        )
+
+    def expire_sessions(self) -> None:
+        self.sessions.clear()
+
+    def close(self):
+        pass
+
+    def execute(self, query: str, include_deleted: bool = False) -> tuple[list[str], list[dict]]:
+        """
+        Returns the selected field names and the matching records of a SOQL query
+        """
+        fields = [
+            field.strip()
+            for field in re.search(r"SELECT(.*?)FROM", query, re.S).group(1).split(",")
+        ]
+        where = query.split("WHERE", 1)[1] if "WHERE" in query else ""
+
+        records = [
+            record for record in self.records if include_deleted or not record["IsDeleted"]
+        ]
+        if "IsSalesRecordType__c = True" in where:
+            records = [record for record in records if record["IsSalesRecordType__c"]]
+        if match := re.search(r"CloseDate >= (\S+) OR CreatedDate >= (\S+?)\)", where):
+            min_date, min_datetime = match.group(1), _timestamp(match.group(2))
+            records = [
+                record
+                for record in records
+                if (record["CloseDate"] or "") >= min_date
+                or _timestamp(record["CreatedDate"]) >= min_datetime
+            ]
+        if match := re.search(r"SystemModstamp > (\S+)", where):
+            modified_after = _timestamp(match.group(1))
+            records = [
+                record
+                for record in records
+                if _timestamp(record["SystemModstamp"]) > modified_after
+            ]
+        return fields, [{field: record[field] for field in fields} for record in records]
+
+    def _json(self, request, body: dict) -> requests.Response:
+        return self._response(request, json.dumps(body), "application/json")
+
+    def _response(self, request, body: str, content_type: str, headers=None, status=200):
+        response = requests.Response()
+        response.status_code = status
+        response.url = request.url
+        response.request = request
+        response.headers["Content-Type"] = content_type
+        response.headers.update(headers or {})
+        response._content = body.encode("utf-8")
+        response.encoding = "utf-8"
+        return response
+
+    def _page(self, request, endpoint: str, cursor: str, offset: int) -> requests.Response:
+        records = self._cursors[cursor]
+        page = records[offset : offset + self.page_size]
+        body = {
+            "totalSize": len(records),
+            "done": offset + self.page_size >= len(records),
+            "records": [{"attributes": {"type": "Opportunity"}, **record} for record in page],
+        }
+        if not body["done"]:
+            body["nextRecordsUrl"] = "/services/data/v59.0/{}/{}-{}".format(
+                endpoint, cursor, offset + self.page_size
+            )
+        return self._json(request, body)
+
+    def _results(self, request, job_id: str, locator: str) -> requests.Response:
+        fields, records = self._jobs[job_id]
+        offset = int(locator or 0)
+        chunk = records[offset : offset + self.chunk_size]
+
+        text = io.StringIO()
+        writer = csv.writer(text, lineterminator="\n")
+        writer.writerow(fields)
+        writer.writerows([_csv_value(record[field]) for field in fields] for record in chunk)
+
+        next_offset = offset + self.chunk_size
+        return self._response(
+            request,
+            text.getvalue(),
+            "text/csv",
+            {
+                "Sforce-Locator": str(next_offset) if next_offset < len(records) else "null",
+                "Sforce-NumberOfRecords": str(len(chunk)),
+            },
+        )
+
+    def send(self, request, **kwargs) -> requests.Response:
+        url = urlsplit(request.url)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.requests.append(url.path)
+
+        if url.path.startswith("/services/Soap/u/"):
+            self.logins += 1
+            session_id = "session-{}".format(self.logins)
+            self.sessions.add(session_id)
+            return self._response(
+                request, _LOGIN_RESPONSE.format(INSTANCE_URL, session_id), "text/xml"
+            )
+        authorization = request.headers.get("Authorization", "")
+        if authorization.removeprefix("Bearer ") not in self.sessions:
+            return self._response(
+                request,
+                json.dumps(
+                    [{"errorCode": "INVALID_SESSION_ID", "message": "Session expired or invalid"}]
+                ),
+                "application/json",
+                status=401,
+            )
+
+        if match := re.fullmatch(r"/services/data/v[\d.]+/(query|queryAll)/", url.path):
+            cursor = str(len(self._cursors))
+            _, self._cursors[cursor] = self.execute(
+                params["q"], include_deleted=match.group(1) == "queryAll"
+            )
+            return self._page(request, match.group(1), cursor, 0)
+        if match := re.fullmatch(r"/services/data/v[\d.]+/(query|queryAll)/(\d+)-(\d+)", url.path):
+            return self._page(request, *match.group(1, 2), int(match.group(3)))
+        if re.fullmatch(r"/services/data/v[\d.]+/jobs/query", url.path):
+            payload = json.loads(request.body)
+            job_id = "750{:015d}".format(len(self._jobs))
+            self._jobs[job_id] = self.execute(
+                payload["query"], include_deleted=payload["operation"] == "queryAll"
+            )
+            return self._json(request, {"id": job_id, "state": "UploadComplete"})
+        if match := re.fullmatch(r"/services/data/v[\d.]+/jobs/query/(\w+)", url.path):
+            return self._json(request, {"id": match.group(1), "state": "JobComplete"})
+        if match := re.fullmatch(r"/services/data/v[\d.]+/jobs/query/(\w+)/results", url.path):
+            return self._results(request, match.group(1), params.get("locator", ""))
+
+        raise AssertionError("Unexpected request {} {}".format(request.method, request.url))
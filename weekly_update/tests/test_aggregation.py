@@ -0,0 +1,168 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from decimal import Decimal
+
+from data.aggregation import AggregationEngine, Split, Top, Total
+from data.cube import CUBE_DIMENSIONS, SplitCube
+from data.transformations import (
+    Category,
+    Metric,
+    category_in_period,
+    split_by,
+    standardize_data,
+    sum_dm,
+    top_opps_in_period,
+    total_in_period,
+)
+
+WINDOWS = [
+    (dt.date(2024, 5, 1), dt.date(2024, 5, 31)),
+    (dt.date(2024, 4, 1), dt.date(2024, 6, 30)),
+    (dt.date(2024, 1, 1), dt.date(2024, 12, 31)),
+]
+
+
+def report_frame() -> pd.DataFrame:
+    """
+    Returns a small standardized frame with a row in every category, a null
+    COMMS_VS_IDENTITY and a null STAGE_1_DATE
+    """
+    rows = [
+        ("Opp A", "Closed-Won", "Won", "Identity", "EMEA", "2024-05-02", 1000.10, "2024-02-01"),
+        ("Opp B", "Closed-Won", "Won", None, "AMER", "2024-05-10", 250.50, "2024-04-15"),
+        ("Opp C", "Business Terms", "Commit", "Comms", "EMEA", "2024-05-20", 500.00, "2024-05-03"),
+        ("Opp D", "Proposal", "Best Case", "Identity", "APAC", "2024-06-30", 750.25, None),
+        ("Opp E", "Closed-Lost", "Ommitted", "Comms", "AMER", "2024-05-15", 300.00, "2024-05-06"),
+        ("Opp F", "Proposal", "Pipeline", "Identity", "EMEA", "2024-07-01", 42.00, "2024-05-20"),
+        ("Opp G", "Business Terms", "Commit", "Identity", "APAC", "2024-05-31", 500.00, "2024-05-31"),
+    ]
+    data = pd.DataFrame(
+        rows,
+        columns=[
+            "NAME",
+            "STAGENAME",
+            "FORECAST_CATEGORY",
+            "COMMS_VS_IDENTITY",
+            "REGION",
+            "CLOSEDATE",
+            "DM",
+            "STAGE_1_DATE",
+        ],
+    )
+    data["CREATED_DATE"] = pd.Timestamp("2024-01-10")
+    return standardize_data(data)
+
+
+@pytest.fixture
+def data():
+    return report_frame()
+
+
+@pytest.mark.parametrize("window", WINDOWS)
+@pytest.mark.parametrize("metric", list(Metric))
+@pytest.mark.parametrize("category", list(Category))
+def test_totals_match_total_in_period(data, category, metric, window):
+    request = Total(category, metric, *window)
+
+    assert AggregationEngine(data).run([request])[request] == total_in_period(
+        data, category, metric, *window
+    )
+
+
+@pytest.mark.parametrize("window", WINDOWS)
+@pytest.mark.parametrize("category", list(Category))
+def test_tops_match_top_opps_in_period(data, category, window):
+    request = Top(category, *window)
+
+    assert AggregationEngine(data).run([request])[request] == top_opps_in_period(
+        data, category, *window
+    )
+
+
+@pytest.mark.parametrize("field", ["STAGENAME", "FORECAST_CATEGORY"])
+def test_splits_off_the_cube_match_split_by(data, field):
+    request = Split(Category.CLOSING, field, *WINDOWS[1])
+
+    assert AggregationEngine(data).run([request])[request] == split_by(
+        category_in_period(data, Category.CLOSING, *WINDOWS[1]), field
+    )
+
+
+def test_duplicate_requests_share_one_subset(data):
+    engine = AggregationEngine(data)
+    requests = [
+        Total(Category.BOOKED, Metric.DM, *WINDOWS[0]),
+        Total(Category.BOOKED, Metric.COUNT, *WINDOWS[0]),
+        Top(Category.BOOKED, *WINDOWS[0]),
+    ]
+
+    results = engine.run(requests + requests)
+
+    assert len(results) == 3
+    assert engine.subset(Category.BOOKED, *WINDOWS[0]) is engine.subset(
+        Category.BOOKED, *WINDOWS[0]
+    )
+    assert list(engine.subset(Category.BOOKED, *WINDOWS[0])["NAME"]) == ["Opp A", "Opp B"]
+
+
+@pytest.mark.parametrize("window", WINDOWS)
+@pytest.mark.parametrize("category", list(Category))
+def test_category_masks_select_the_same_rows(data, category, window):
+    positions = AggregationEngine(data).positions(category, *window)
+
+    assert list(data["NAME"].iloc[positions]) == list(
+        category_in_period(data, category, *window)["NAME"]
+    )
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [
+        ("FORECAST_CATEGORY", "Won"),
+        ("STAGENAME", "Business Terms"),
+        ("COMMS_VS_IDENTITY", "Identity"),
+        ("FORECAST_CATEGORY", "Omitted"),  # not a category, the data spells it "Ommitted"
+    ],
+)
+def test_value_masks_on_codes_match_string_comparison(data, field, value):
+    engine = AggregationEngine(data)
+    strings = AggregationEngine(data.astype({field: object}))
+
+    expected = (data[field].astype(object) == value).to_numpy()
+    np.testing.assert_array_equal(engine.value_mask(field, value), expected)
+    np.testing.assert_array_equal(strings.value_mask(field, value), expected)
+    assert engine.value_mask(field, value) is engine.value_mask(field, value)
+
+
+@pytest.mark.parametrize("window", WINDOWS)
+@pytest.mark.parametrize("field", CUBE_DIMENSIONS)
+@pytest.mark.parametrize("category", list(Category))
+def test_cube_splits_match_split_by(data, category, field, window):
+    request = Split(category, field, *window)
+
+    assert AggregationEngine(data).run([request])[request] == split_by(
+        category_in_period(data, category, *window), field
+    )
+
+
+def test_cube_keeps_missing_values_out_of_splits_but_in_totals(data):
+    engine = AggregationEngine(data)
+    window = (Category.BOOKED, *WINDOWS[0])
+    cube = SplitCube(data, {window: engine.positions(*window)})
+    booked = engine.subset(*window)
+
+    # Opp B has no COMMS_VS_IDENTITY: it counts towards the total and its region
+    assert cube.total(window) == sum_dm(booked) == Decimal("1250.60")
+    assert cube.rollup(window, "REGION") == {
+        "AMER": Decimal("250.50"),
+        "EMEA": Decimal("1000.10"),
+    }
+    assert cube.rollup(window, "COMMS_VS_IDENTITY") == {"Identity": Decimal("1000.10")}
+    assert cube.split(window, "COMMS_VS_IDENTITY") == split_by(booked, "COMMS_VS_IDENTITY")
+    assert cube.rollup(window, "REGION", COMMS_VS_IDENTITY="Identity") == {
+        "EMEA": Decimal("1000.10")
+    }
@@ -0,0 +1,67 @@
+import contextlib
+import io
+
+import pandas as pd
+import pytest
+
+from decimal import Decimal
+
+pytest.importorskip("pyarrow", exc_type=ImportError)
+
+from benchmarks.synthetic import AS_OF, synthetic_records
+from data.arrow_frame import is_frame_file, read_frame, write_frame
+from data.transformations import (
+    CATEGORICAL_FIELDS,
+    DATE_FIELDS,
+    DM_FIELD,
+    REPORT_FIELDS,
+    salesforce_dict_to_dataframe,
+)
+from data.weekly_update import generate_weekly_update_dict
+
+
+@pytest.fixture(scope="module")
+def data():
+    return salesforce_dict_to_dataframe(synthetic_records(2_000))
+
+
+def _report(data) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generate_weekly_update_dict(
+            data=data,
+            management_call=Decimal(2_000_000),
+            monthly_pipe_target=Decimal(861_326),
+            for_date=AS_OF,
+        )
+
+
+@pytest.mark.parametrize("memory_map", [True, False])
+def test_frame_round_trip_keeps_dtypes(data, tmp_path, memory_map):
+    loaded = read_frame(write_frame(data, str(tmp_path / "data.arrow")), memory_map)
+
+    assert list(loaded.columns) == list(data.columns)
+    assert loaded[DM_FIELD].dtype == "int64"
+    for column in [*DATE_FIELDS, "CREATED_DATE"]:
+        assert loaded[column].dtype == "datetime64[ns]"
+    for column in CATEGORICAL_FIELDS:
+        assert isinstance(loaded[column].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(loaded[REPORT_FIELDS], data[REPORT_FIELDS])
+
+
+def test_report_from_mapped_frame_matches_in_memory(data, tmp_path):
+    mapped = read_frame(write_frame(data, str(tmp_path / "data.feather")))
+
+    assert _report(mapped) == _report(data)
+
+
+def test_read_frame_rejects_other_arrow_files(data, tmp_path):
+    file_path = str(tmp_path / "other.arrow")
+    data.to_feather(file_path)
+
+    with pytest.raises(ValueError, match="not a weekly update frame"):
+        read_frame(file_path)
+
+
+def test_is_frame_file():
+    assert is_frame_file("data.arrow") and is_frame_file("DATA.FEATHER")
+    assert not is_frame_file("data.parquet")
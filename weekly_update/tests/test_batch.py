@@ -0,0 +1,19 @@
+import datetime as dt
+
+import pytest
+import typer
+
+from batch import report_dates
+
+
+def test_report_dates_merges_dates_and_range():
+    assert report_dates(["2024-05-20", "2024-05-06"], "2024-05-06", "2024-05-20", 7) == [
+        dt.date(2024, 5, 6),
+        dt.date(2024, 5, 13),
+        dt.date(2024, 5, 20),
+    ]
+
+
+def test_report_dates_rejects_end_date_without_start_date():
+    with pytest.raises(typer.BadParameter, match="--start-date"):
+        report_dates(["2024-05-20"], None, "2024-06-30", 7)
@@ -0,0 +1,67 @@
+import datetime as dt
+
+import pytest
+
+from data import business_days as business_days_module
+from data.business_days import (
+    CALENDARS,
+    BusinessCalendar,
+    business_days,
+    get_calendar,
+    register_calendar,
+)
+
+
+@pytest.mark.parametrize(
+    "calendar, start_date, end_date, expected",
+    [
+        # Thanksgiving
+        ("us", dt.date(2024, 11, 25), dt.date(2024, 11, 29), 4),
+        # Independence Day on a Saturday is observed on the Friday
+        ("us", dt.date(2026, 6, 29), dt.date(2026, 7, 3), 4),
+        # Christmas on a Saturday is observed on the Friday before, and the
+        # Saturday New Year's Day of the next year on Friday 31 December
+        ("us", dt.date(2021, 12, 20), dt.date(2021, 12, 31), 8),
+        ("us", dt.date(2021, 12, 27), dt.date(2022, 1, 7), 9),
+        # Good Friday and Easter Monday
+        ("uk", dt.date(2024, 3, 25), dt.date(2024, 3, 29), 4),
+        ("uk", dt.date(2024, 4, 1), dt.date(2024, 4, 5), 4),
+        # Christmas and Boxing Day on a weekend move to Monday and Tuesday
+        ("uk", dt.date(2021, 12, 27), dt.date(2021, 12, 31), 3),
+        ("uk", dt.date(2022, 1, 3), dt.date(2022, 1, 7), 4),
+        # Early and late May bank holidays
+        ("uk", dt.date(2024, 5, 1), dt.date(2024, 5, 31), 21),
+        ("weekdays", dt.date(2024, 11, 25), dt.date(2024, 11, 29), 5),
+    ],
+)
+def test_holiday_weeks(calendar, start_date, end_date, expected):
+    assert business_days(start_date, end_date, calendar) == expected
+
+
+def test_counts_are_inclusive_and_empty_when_reversed():
+    assert business_days(dt.date(2024, 5, 6), dt.date(2024, 5, 6)) == 1
+    assert business_days(dt.date(2024, 5, 4), dt.date(2024, 5, 5)) == 0
+    assert business_days(dt.date(2024, 5, 10), dt.date(2024, 5, 6)) == 0
+
+
+def test_holidays_include_those_observed_from_a_neighbouring_year():
+    assert dt.date(2021, 12, 31) in get_calendar("us").holidays(2021)
+    assert dt.date(2022, 1, 1) not in get_calendar("us").holidays(2022)
+
+
+def test_registered_calendar_replaces_cached_counts(monkeypatch):
+    monkeypatch.setattr(business_days_module, "CALENDARS", dict(CALENDARS))
+    week = (dt.date(2024, 7, 1), dt.date(2024, 7, 5))
+
+    register_calendar(BusinessCalendar("shutdown", holidays=[dt.date(2024, 7, 1)]))
+    assert business_days(*week, "shutdown") == 4
+
+    register_calendar(
+        BusinessCalendar("shutdown", holidays=[dt.date(2024, 7, 1), dt.date(2024, 7, 2)])
+    )
+    assert business_days(*week, "shutdown") == 3
+
+
+def test_unknown_calendar_raises():
+    with pytest.raises(KeyError, match="Unknown business day calendar 'mars'"):
+        business_days(dt.date(2024, 5, 1), dt.date(2024, 5, 31), "mars")
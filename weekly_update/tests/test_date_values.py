@@ -0,0 +1,65 @@
+import datetime as dt
+
+import pytest
+
+from decimal import Decimal
+
+from data.date_values import ReportCalendar, Window
+from datequarter.datequarter import DateQuarter
+
+
+def test_for_date_shares_one_instance_per_date_and_calendar():
+    date = dt.date(2024, 5, 22)
+
+    assert ReportCalendar.for_date(date) is ReportCalendar.for_date(date)
+    assert ReportCalendar.for_date(date, "us") is not ReportCalendar.for_date(date)
+
+
+def test_sunday_reports_on_the_week_that_just_ended():
+    sunday = ReportCalendar.for_date(dt.date(2024, 5, 26))
+    wednesday = ReportCalendar.for_date(dt.date(2024, 5, 22))
+
+    assert sunday.cw == wednesday.cw == Window(dt.date(2024, 5, 19), dt.date(2024, 5, 25))
+    assert sunday.cm == Window(dt.date(2024, 5, 1), dt.date(2024, 5, 31))
+    assert sunday.cq_to_date == Window(dt.date(2024, 4, 1), dt.date(2024, 5, 26))
+    assert sunday.mtd_business_days == wednesday.mtd_business_days + 2 == 18
+
+
+def test_last_day_of_a_quarter():
+    calendar = ReportCalendar.for_date(dt.date(2024, 6, 30))
+
+    assert calendar.cq_quarter is DateQuarter(2024, 2)
+    assert calendar.cq == Window(dt.date(2024, 4, 1), dt.date(2024, 6, 30))
+    assert calendar.cq_to_date == calendar.cq
+    assert calendar.month_of_quarter == 2
+    assert calendar.mtd_business_days_percent == calendar.qtd_business_days_percent == 1
+    assert calendar.window("cq_minus_1") == Window(dt.date(2024, 1, 1), dt.date(2024, 3, 31))
+    assert calendar.window("trailing_4q") == Window(dt.date(2023, 4, 1), dt.date(2024, 3, 31))
+
+
+def test_first_day_of_a_quarter():
+    calendar = ReportCalendar.for_date(dt.date(2024, 7, 1), "us")
+
+    assert calendar.cq == Window(dt.date(2024, 7, 1), dt.date(2024, 9, 30))
+    assert calendar.cq_to_date == Window(dt.date(2024, 7, 1), dt.date(2024, 7, 1))
+    # The week still starts in the previous quarter
+    assert calendar.cw == Window(dt.date(2024, 6, 30), dt.date(2024, 7, 6))
+    assert calendar.month_of_quarter == 0
+    # 23 weekdays less Independence Day
+    assert (calendar.mtd_business_days, calendar.cm_business_days) == (1, 22)
+    assert calendar.mtd_business_days_percent == Decimal("0.045455")
+
+
+def test_first_day_of_a_year():
+    calendar = ReportCalendar.for_date(dt.date(2025, 1, 1), "us")
+
+    assert calendar.ytd == Window(dt.date(2025, 1, 1), dt.date(2025, 1, 1))
+    assert calendar.cq_minus(1) is DateQuarter(2024, 4)
+    assert calendar.trailing_quarters(4) == [DateQuarter(2024, n) for n in range(1, 5)]
+    # New Year's Day is a holiday, so no business days have passed
+    assert calendar.qtd_business_days_percent == 0
+
+
+def test_unknown_window_raises():
+    with pytest.raises(KeyError, match="Unknown report window 'cq_plus_1'"):
+        ReportCalendar.for_date(dt.date(2024, 5, 22)).window("cq_plus_1")
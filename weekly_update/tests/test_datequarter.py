@@ -0,0 +1,33 @@
+import copy
+import datetime as dt
+import pickle
+
+import pytest
+
+from datequarter.datequarter import DateQuarter
+
+
+def test_instances_are_interned():
+    assert DateQuarter(2024, 5) is DateQuarter(2025, 1)
+    assert DateQuarter.from_date(dt.date(2024, 8, 15)) is DateQuarter(2024, 3)
+
+
+@pytest.mark.parametrize("name", ["_year", "_quarter", "_start_date", "_end_date", "other"])
+def test_instances_cannot_be_mutated(name):
+    quarter = DateQuarter(2024, 2)
+
+    with pytest.raises(AttributeError, match="immutable"):
+        setattr(quarter, name, 1)
+    with pytest.raises(AttributeError, match="immutable"):
+        delattr(quarter, name)
+
+    assert DateQuarter(2024, 2).start_date() == dt.date(2024, 4, 1)
+    assert DateQuarter(2024, 2).end_date() == dt.date(2024, 6, 30)
+
+
+def test_pickle_and_copy_return_the_interned_instance():
+    quarter = DateQuarter(2024, 4)
+
+    assert pickle.loads(pickle.dumps(quarter)) is quarter
+    assert copy.copy(quarter) is quarter
+    assert copy.deepcopy(quarter) is quarter
@@ -0,0 +1,110 @@
+import contextlib
+import datetime as dt
+import io
+
+import pytest
+
+from decimal import Decimal
+
+pytest.importorskip("pyarrow", exc_type=ImportError)
+
+from benchmarks.synthetic import AS_OF, synthetic_records
+from data.transformations import (
+    DM_CENTS_FIELD,
+    DM_FIELD,
+    REPORT_FIELDS,
+    load_from_file,
+    salesforce_dict_to_dataframe,
+    save_to_file,
+)
+from data.weekly_update import generate_weekly_update_dict
+
+
+@pytest.fixture(scope="module")
+def data():
+    return salesforce_dict_to_dataframe(synthetic_records(2_000))
+
+
+def _report(data) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generate_weekly_update_dict(
+            data=data,
+            management_call=Decimal(2_000_000),
+            monthly_pipe_target=Decimal(861_326),
+            for_date=AS_OF,
+        )
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_save_to_file_round_trip(data, tmp_path, suffix):
+    loaded = load_from_file(save_to_file(data, str(tmp_path / f"data{suffix}")))
+
+    assert list(loaded.columns) == REPORT_FIELDS
+    assert loaded[DM_FIELD].dtype == "int64"
+    assert (loaded[DM_FIELD].to_numpy() == data[DM_FIELD].to_numpy()).all()
+    assert _report(loaded) == _report(data)
+
+
+_HEADER = (
+    "NAME,STAGENAME,FORECAST_CATEGORY,COMMS_VS_IDENTITY,REGION,CLOSEDATE,DM,"
+    "CREATED_DATE,STAGE_1_DATE\n"
+)
+
+
+def _dollar_csv(tmp_path, *amounts: str) -> str:
+    file_path = tmp_path / "dollars.csv"
+    file_path.write_text(
+        _HEADER
+        + "".join(
+            f"Opp {index},Proposal,Best Case,Identity,EMEA,2024-05-15,{amount},2024-01-10,\n"
+            for index, amount in enumerate(amounts)
+        )
+    )
+    return str(file_path)
+
+
+def test_saved_files_mark_dm_as_cents(data, tmp_path):
+    file_path = save_to_file(data, str(tmp_path / "data.csv"))
+
+    with open(file_path) as csv_file:
+        assert csv_file.readline().strip().split(",") == [
+            DM_CENTS_FIELD if column == DM_FIELD else column for column in REPORT_FIELDS
+        ]
+
+
+def test_whole_dollar_dm_is_read_as_dollars(tmp_path):
+    loaded = load_from_file(_dollar_csv(tmp_path, "15000", "250", "0"))
+
+    assert loaded[DM_FIELD].dtype == "int64"
+    assert loaded[DM_FIELD].tolist() == [1500000, 25000, 0]
+
+
+def test_mixed_whole_and_fractional_dm_is_read_as_dollars(tmp_path):
+    loaded = load_from_file(_dollar_csv(tmp_path, "15000", "1234.125", "10.5"))
+
+    assert loaded[DM_FIELD].tolist() == [1500000, 123412, 1050]
+
+
+def test_integer_parquet_dm_is_read_as_dollars(data, tmp_path):
+    file_path = str(tmp_path / "dollars.parquet")
+    dollars = data[REPORT_FIELDS].assign(**{DM_FIELD: data[DM_FIELD] // 100})
+    dollars.to_parquet(file_path, index=False)
+
+    loaded = load_from_file(file_path)
+
+    assert (loaded[DM_FIELD].to_numpy() == dollars[DM_FIELD].to_numpy() * 100).all()
+
+
+def test_fractional_dm_is_read_as_dollars(tmp_path):
+    file_path = tmp_path / "dollars.csv"
+    file_path.write_text(
+        _HEADER
+        + "Opp 1,Proposal,Best Case,Identity,EMEA,2024-05-15,1234.125,2024-01-10,\n"
+        "Opp 2,Closed-Won,Won,Bundle,APAC,2024-05-16,10.5,2024-01-11,2024-01-20\n"
+    )
+
+    loaded = load_from_file(str(file_path))
+
+    assert loaded[DM_FIELD].tolist() == [123412, 1050]
+    assert loaded["STAGE_1_DATE"].isna().tolist() == [True, False]
+    assert loaded["CLOSEDATE"].tolist() == [dt.datetime(2024, 5, 15), dt.datetime(2024, 5, 16)]
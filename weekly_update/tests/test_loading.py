@@ -0,0 +1,24 @@
+import pytest
+
+from data.loading import SNAPSHOT_FILE, load_opportunities
+from data.snapshot import OpportunitySnapshot, sync_snapshot
+
+from fakes import FakeSalesforceServer, opportunity
+
+
+def test_offline_loads_the_snapshot(tmp_path):
+    with OpportunitySnapshot(str(tmp_path / SNAPSHOT_FILE)) as snapshot:
+        synced = sync_snapshot(
+            snapshot,
+            "2024-01-01",
+            salesforce_session=FakeSalesforceServer([opportunity(1), opportunity(2)]).session(),
+        )
+
+    data = load_opportunities("2024-01-01", str(tmp_path), offline=True)
+
+    assert sorted(data["NAME"]) == sorted(synced["NAME"]) == ["Opp 1", "Opp 2"]
+
+
+def test_offline_without_a_snapshot_raises(tmp_path):
+    with pytest.raises(ValueError, match="holds no records"):
+        load_opportunities("2024-01-01", str(tmp_path), offline=True)
@@ -0,0 +1,107 @@
+import pandas as pd
+import pytest
+import simple_salesforce.bulk2
+
+from data.query import SALESFORCE_QUERY, fetch_opportunities
+from data.transformations import (
+    REPORT_FIELDS,
+    SalesforceFrameBuilder,
+    salesforce_batches_to_dataframe,
+)
+
+from fakes import FakeSalesforceServer, opportunity
+
+QUERY = SALESFORCE_QUERY.substitute(
+    {"MIN_DATE": "2024-01-01", "MIN_DATETIME": "2024-01-01T00:00:00.000Z"}
+)
+
+
+@pytest.fixture(autouse=True)
+def no_bulk_wait(monkeypatch):
+    monkeypatch.setattr(simple_salesforce.bulk2, "sleep", lambda seconds: None)
+
+
+def _records() -> list[dict]:
+    return [
+        opportunity(1, Name="NA"),
+        opportunity(2, SAO_Date__c=None),
+        opportunity(3, Comms_vs_Identity__c=None, Amount_Direct_Margin__c=0.125),
+        opportunity(4, StageName="Closed-Won", ForecastCategoryName="Closed"),
+        opportunity(5, Name="N/A, Inc.", Amount_Direct_Margin__c=12345678.9),
+    ]
+
+
+def _used_bulk(server: FakeSalesforceServer) -> bool:
+    return any("/jobs/query" in request for request in server.requests)
+
+
+@pytest.mark.parametrize(
+    "bulk_threshold, page_size, bulk",
+    [
+        (4, 2, True),  # over the threshold, more pages to come
+        (5, 2, False),  # at the threshold
+        (4, 5, False),  # over the threshold, but the first page is all of it
+    ],
+)
+def test_bulk_is_used_over_the_threshold(bulk_threshold, page_size, bulk):
+    server = FakeSalesforceServer(_records(), page_size=page_size, chunk_size=2)
+
+    data = fetch_opportunities(QUERY, server.session(), bulk_threshold=bulk_threshold)
+
+    assert _used_bulk(server) == bulk
+    assert sorted(data["NAME"]) == ["N/A, Inc.", "NA", "Opp 2", "Opp 3", "Opp 4"]
+
+
+def test_bulk_csv_chunks_match_rest():
+    rest_server = FakeSalesforceServer(_records(), page_size=2)
+    bulk_server = FakeSalesforceServer(_records(), page_size=2, chunk_size=2)
+
+    rest = fetch_opportunities(QUERY, rest_server.session(), bulk_threshold=10)
+    bulk = fetch_opportunities(QUERY, bulk_server.session(), bulk_threshold=1)
+
+    # Three CSV chunks of at most two records
+    assert sum(request.endswith("/results") for request in bulk_server.requests) == 3
+    pd.testing.assert_frame_equal(bulk[REPORT_FIELDS], rest[REPORT_FIELDS])
+
+    by_name = bulk.set_index("NAME")
+    assert by_name.loc["NA", "DM"] == 100100
+    assert by_name.loc["Opp 3", "DM"] == 12
+    assert by_name.loc["N/A, Inc.", "DM"] == 1234567890
+    assert pd.isna(by_name.loc["Opp 2", "STAGE_1_DATE"])
+    assert pd.isna(by_name.loc["Opp 3", "COMMS_VS_IDENTITY"])
+    assert by_name.loc["Opp 4", "FORECAST_CATEGORY"] == "Won"
+
+
+def test_empty_dm_is_rejected_by_rest_and_bulk():
+    records = [opportunity(1), opportunity(2, Amount_Direct_Margin__c=None)]
+
+    with pytest.raises(TypeError, match="null values"):
+        fetch_opportunities(QUERY, FakeSalesforceServer(records).session())
+    with pytest.raises(TypeError, match="null values"):
+        fetch_opportunities(
+            QUERY, FakeSalesforceServer(records, page_size=1).session(), bulk_threshold=1
+        )
+
+
+def test_batches_match_a_single_page():
+    records = [{**record, "attributes": {}} for record in _records()]
+
+    pd.testing.assert_frame_equal(
+        salesforce_batches_to_dataframe([records[:2], records[2:4], records[4:]]),
+        salesforce_batches_to_dataframe([records]),
+    )
+
+
+def test_frame_builder_converts_each_batch():
+    records = _records()
+    builder = SalesforceFrameBuilder()
+    builder.extend(records[:3])
+
+    with pytest.raises(TypeError, match="null values"):
+        builder.extend([opportunity(6, Amount_Direct_Margin__c=None)])
+    builder.extend(records[3:])
+
+    data = builder.to_dataframe()
+    assert len(builder) == data.shape[0] == 5
+    assert data["DM"].dtype == "int64"
+    assert data["FORECAST_CATEGORY"].cat.categories.tolist() == ["Best Case", "Won"]
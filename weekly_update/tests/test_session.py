@@ -0,0 +1,88 @@
+import datetime as dt
+import json
+import os
+import stat
+
+import pytest
+
+from data.session import SalesforceSessionManager
+
+from fakes import INSTANCE_URL, FakeSalesforceServer, opportunity
+
+QUERY = "SELECT Id, Name FROM Opportunity"
+
+
+@pytest.fixture
+def server():
+    return FakeSalesforceServer([opportunity(1), opportunity(2)])
+
+
+def _manager(server, cache_path) -> SalesforceSessionManager:
+    manager = SalesforceSessionManager("user@example.com", "password", "token", str(cache_path))
+    server.mount(manager._http)
+    return manager
+
+
+def _cache(cache_path, session_id="fake-session", username="user@example.com"):
+    expires = dt.datetime.now(dt.timezone.utc) + dt.timedelta(hours=1)
+    cache_path.write_text(
+        json.dumps(
+            {
+                "username": username,
+                "session_id": session_id,
+                "instance": INSTANCE_URL.removeprefix("https://"),
+                "expires": expires.isoformat(),
+            }
+        )
+    )
+
+
+def _mode(path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_cached_session_is_reused_without_a_login(server, tmp_path):
+    cache_path = tmp_path / "session.json"
+    _cache(cache_path)
+
+    result = _manager(server, cache_path).query(QUERY)
+
+    assert result["totalSize"] == 2
+    assert server.logins == 0
+
+
+def test_cache_for_another_user_logs_in(server, tmp_path):
+    cache_path = tmp_path / "session.json"
+    _cache(cache_path, username="other@example.com")
+
+    _manager(server, cache_path).query(QUERY)
+
+    assert server.logins == 1
+    assert json.loads(cache_path.read_text())["session_id"] == "session-1"
+
+
+def test_login_tightens_an_existing_cache_file(server, tmp_path):
+    cache_path = tmp_path / "session.json"
+    cache_path.write_text("{}")
+    os.chmod(cache_path, 0o644)
+
+    _manager(server, cache_path).login()
+
+    assert _mode(cache_path) == 0o600
+    assert json.loads(cache_path.read_text())["username"] == "user@example.com"
+
+
+def test_expired_session_logs_in_again_and_retries(server, tmp_path):
+    cache_path = tmp_path / "session.json"
+    _cache(cache_path)
+    manager = _manager(server, cache_path)
+    manager.query(QUERY)
+    server.expire_sessions()
+
+    result = manager.query(QUERY)
+
+    assert result["totalSize"] == 2
+    assert server.logins == 1
+    assert json.loads(cache_path.read_text())["session_id"] == "session-1"
+    # The first query, the rejected one, the login and the retry
+    assert [path.split("/")[2] for path in server.requests] == ["data", "data", "Soap", "data"]
@@ -0,0 +1,119 @@
+import pytest
+
+from data.snapshot import OpportunitySnapshot, sync_snapshot
+
+from fakes import FakeSalesforceServer, opportunity
+
+MIN_DATE = "2024-01-01"
+LATER = "2024-05-10T09:00:00.000+0000"
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    with OpportunitySnapshot(str(tmp_path / "snapshot.sqlite")) as snapshot:
+        yield snapshot
+
+
+@pytest.fixture
+def server():
+    return FakeSalesforceServer(
+        [
+            opportunity(1),
+            opportunity(2, Amount_Direct_Margin__c=2500.5),
+            opportunity(3, IsSalesRecordType__c=False),
+            opportunity(
+                4, CloseDate="2023-06-30", CreatedDate="2023-02-01T10:00:00.000+0000"
+            ),
+        ],
+        page_size=1,
+    )
+
+
+def _names(data) -> list[str]:
+    return sorted(data["NAME"])
+
+
+def _sync(snapshot, server, min_date=MIN_DATE):
+    return sync_snapshot(snapshot, min_date, salesforce_session=server.session())
+
+
+def test_full_sync_applies_the_query_filters(snapshot, server):
+    data = _sync(snapshot, server)
+
+    assert _names(data) == ["Opp 1", "Opp 2"]
+    assert data.set_index("NAME").loc["Opp 2", "DM"] == 250050
+    assert snapshot.min_date() == MIN_DATE
+    assert snapshot.last_sync() == "2024-05-01T12:00:00.000+0000"
+    assert not any("/queryAll/" in request for request in server.requests)
+
+
+def test_delta_sync_upserts_modified_records(snapshot, server):
+    _sync(snapshot, server)
+    server.records[0].update(SystemModstamp=LATER, StageName="Negotiation")
+    server.records.append(opportunity(5, SystemModstamp=LATER))
+    server.requests.clear()
+
+    data = _sync(snapshot, server)
+
+    assert _names(data) == ["Opp 1", "Opp 2", "Opp 5"]
+    assert data.set_index("NAME").loc["Opp 1", "STAGENAME"] == "Negotiation"
+    assert snapshot.last_sync() == LATER
+    assert all("/queryAll/" in request for request in server.requests)
+
+
+def test_delta_sync_removes_deleted_records(snapshot, server):
+    _sync(snapshot, server)
+    server.records[1].update(SystemModstamp=LATER, IsDeleted=True)
+
+    assert _names(_sync(snapshot, server)) == ["Opp 1"]
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"IsSalesRecordType__c": False},
+        {"CloseDate": "2023-12-15", "CreatedDate": "2023-11-01T10:00:00.000+0000"},
+    ],
+    ids=["record_type", "close_date"],
+)
+def test_delta_sync_removes_records_that_stop_matching(snapshot, server, change):
+    _sync(snapshot, server)
+    server.records[1].update(SystemModstamp=LATER, **change)
+
+    assert _names(_sync(snapshot, server)) == ["Opp 1"]
+    assert len(snapshot) == 1
+
+
+def test_newer_min_date_prunes_without_a_full_query(snapshot, server):
+    server.records[1].update(
+        CloseDate="2024-02-15", CreatedDate="2023-12-01T10:00:00.000+0000"
+    )
+    _sync(snapshot, server)
+    server.requests.clear()
+
+    data = _sync(snapshot, server, min_date="2024-03-01")
+
+    assert _names(data) == ["Opp 1"]
+    assert snapshot.min_date() == "2024-03-01"
+    assert all("/queryAll/" in request for request in server.requests)
+
+
+def test_older_min_date_runs_a_full_query(snapshot, server):
+    _sync(snapshot, server)
+    server.requests.clear()
+
+    data = _sync(snapshot, server, min_date="2023-01-01")
+
+    assert _names(data) == ["Opp 1", "Opp 2", "Opp 4"]
+    assert snapshot.min_date() == "2023-01-01"
+    assert not any("/queryAll/" in request for request in server.requests)
+
+
+def test_empty_snapshot_raises(snapshot):
+    with pytest.raises(ValueError, match="holds no records"):
+        snapshot.to_dataframe()
+
+
+def test_sync_with_no_matching_records_raises(snapshot):
+    with pytest.raises(ValueError, match="holds no records"):
+        _sync(snapshot, FakeSalesforceServer([opportunity(1, IsDeleted=True)]))
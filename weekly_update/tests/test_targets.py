@@ -0,0 +1,17 @@
+from decimal import Decimal
+
+from data.targets import select_template
+
+
+def test_select_template_keeps_template_with_management_call():
+    assert select_template(Decimal(2_000_000)) == (Decimal(2_000_000), "default.txt")
+    assert select_template(Decimal(5), "default_old.txt") == (Decimal(5), "default_old.txt")
+
+
+def test_select_template_without_management_call_uses_no_call_variant():
+    assert select_template(None) == (Decimal(0), "default_no_mgmt_call.txt")
+    assert select_template(Decimal(0), "default_old.txt") == (
+        Decimal(0),
+        "default_old_no_mgmt_call.txt",
+    )
+    assert select_template(None, "custom.txt") == (Decimal(0), "custom.txt")
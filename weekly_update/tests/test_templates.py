@@ -0,0 +1,109 @@
+import contextlib
+import io
+import re
+
+from decimal import Decimal
+
+import pytest
+
+from benchmarks.synthetic import AS_OF, synthetic_records
+from data.date_values import ReportCalendar
+from data.formatting import fmt_currency
+from data.metrics import (
+    DEFAULT_TOP_N,
+    METRICS,
+    MetricDefinition,
+    metric_definitions,
+    register_metric,
+    top_n_for_fields,
+)
+from data.template import CompiledTemplate
+from data.transformations import (
+    Category,
+    Metric,
+    category_in_period,
+    salesforce_dict_to_dataframe,
+    split_by,
+    total_in_period,
+)
+from data.weekly_update import generate_weekly_update_dict
+
+
+@pytest.fixture(scope="module")
+def data():
+    return salesforce_dict_to_dataframe(synthetic_records(2_000))
+
+
+@pytest.fixture
+def restore_metrics():
+    metrics = dict(METRICS)
+    yield
+    METRICS.clear()
+    METRICS.update(metrics)
+    metric_definitions.cache_clear()
+
+
+def _render(data, text: str) -> str:
+    template = CompiledTemplate(text)
+    with contextlib.redirect_stdout(io.StringIO()):
+        values = generate_weekly_update_dict(
+            data=data,
+            management_call=Decimal(2_000_000),
+            monthly_pipe_target=Decimal(861_326),
+            for_date=AS_OF,
+            fields=template.fields,
+        )
+    return template.render(values)
+
+
+def test_top_n_for_fields():
+    assert top_n_for_fields(["cw_booked_opp_1", "cq_commit_opp_10", "cw_stage_1_opp_dm"]) == 10
+    assert top_n_for_fields(["cm_commit_opp_2"]) == 2
+    assert top_n_for_fields(["cq_booked_dm"]) == DEFAULT_TOP_N
+
+
+def test_template_asking_for_top_10_lists_gets_them(data):
+    prefixes = ["cq_best_case_opp", "cm_commit_opp", "cq_commit_opp", "cw_booked_opp"]
+    text = "\n".join(f"${prefix}_1 / ${prefix}_10" for prefix in prefixes)
+
+    rendered = _render(data, text)
+
+    assert "$" + "cw_booked_opp_10" not in rendered
+    for line in rendered.splitlines():
+        assert re.fullmatch(r"Opp \d+ - \$[\d.]+k / Opp \d+ - \$[\d.]+k", line), line
+
+
+def test_registered_metrics_render_in_templates(data, restore_metrics):
+    cq = ReportCalendar.for_date(AS_OF).cq
+    register_metric(
+        "cq_closing_opps",
+        MetricDefinition(Category.CLOSING, Metric.COUNT, "cq", None, lambda count, _: count),
+    )
+    register_metric(
+        "cq_emea_closing_dm",
+        MetricDefinition(
+            Category.CLOSING,
+            Metric.DM,
+            "cq",
+            "REGION",
+            lambda split, _: fmt_currency(split["DM"]["EMEA"], 1),
+        ),
+    )
+    # Replacing a definition drops the cached field list
+    register_metric(
+        "current_month",
+        MetricDefinition(
+            None, None, None, None, lambda _, report: report.calendar.cm_name.upper()
+        ),
+    )
+
+    rendered = _render(
+        data, "$current_month: $cq_closing_opps closing, $cq_emea_closing_dm EMEA"
+    )
+
+    emea = split_by(category_in_period(data, Category.CLOSING, *cq), "REGION")["DM"]["EMEA"]
+    assert rendered == "{}: {} closing, {} EMEA".format(
+        AS_OF.strftime("%B").upper(),
+        total_in_period(data, Category.CLOSING, Metric.COUNT, *cq),
+        fmt_currency(emea, 1),
+    )
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from decimal import Decimal
+
+from data.transformations import EMPTY_OPP, _top_n_opps, top_n_opps_by
+
+
+def _opps(*rows) -> pd.DataFrame:
+    """
+    Returns a frame of (NAME, FORECAST_CATEGORY, DM in cents) <rows>
+    """
+    data = pd.DataFrame(rows, columns=["NAME", "FORECAST_CATEGORY", "DM"])
+    data["FORECAST_CATEGORY"] = data["FORECAST_CATEGORY"].astype("category")
+    return data
+
+
+@pytest.fixture
+def data():
+    return _opps(
+        ("Opp E", "Commit", 50_000),
+        ("Opp C", "Commit", 90_000),
+        ("Opp D", "Best Case", 90_000),
+        ("Opp A", "Commit", 90_000),
+        ("Opp B", "Best Case", 90_000),
+        ("Opp F", "Commit", 10_000),
+        ("Opp G", "Best Case", 75_000),
+    )
+
+
+def test_ties_are_broken_by_name(data):
+    assert _top_n_opps(data) == [
+        ("Opp A", Decimal("900.00")),
+        ("Opp B", Decimal("900.00")),
+        ("Opp C", Decimal("900.00")),
+    ]
+    assert _top_n_opps(data, number=5)[3:] == [
+        ("Opp D", Decimal("900.00")),
+        ("Opp G", Decimal("750.00")),
+    ]
+
+
+def test_short_lists_are_filled(data):
+    assert _top_n_opps(data[:2], number=4) == [
+        ("Opp C", Decimal("900.00")),
+        ("Opp E", Decimal("500.00")),
+        EMPTY_OPP,
+        EMPTY_OPP,
+    ]
+    assert _top_n_opps(data[:0]) == [EMPTY_OPP] * 3
+    assert _top_n_opps(data[:2], number=4, fill=None) == _top_n_opps(data[:2], number=2)
+
+
+@pytest.mark.parametrize("number", [1, 2, 3, 5])
+def test_top_n_opps_by_matches_one_call_per_category(data, number):
+    by_category = top_n_opps_by(data, "FORECAST_CATEGORY", number)
+
+    assert by_category == {
+        category: _top_n_opps(data[data["FORECAST_CATEGORY"] == category], number)
+        for category in ["Commit", "Best Case"]
+    }
+    assert by_category["Best Case"][:2] == [
+        ("Opp B", Decimal("900.00")),
+        ("Opp D", Decimal("900.00")),
+    ][:number]
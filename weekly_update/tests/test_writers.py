@@ -0,0 +1,134 @@
+import io
+import json
+
+import docx
+import pytest
+
+from decimal import Decimal
+
+from document_handler.document import BULLET, HEADING, PARAGRAPH, parse_report
+from document_handler.writers import WRITERS, output_paths, write_outputs
+
+REPORT = """# Bookings
+> Booked this week: $1.2M
+>> Opp 1 - $400.0k
+## Pipeline
+Pipeline is on track
+"""
+
+TITLE = "May 20 - May 26"
+
+
+def _paragraphs(output) -> list[tuple[str, str]]:
+    return [
+        (paragraph.style.name, paragraph.text)
+        for paragraph in docx.Document(output).paragraphs
+        if paragraph.text
+    ]
+
+
+def test_docx_writer_writes_paths_and_buffers(tmp_path):
+    document = parse_report(REPORT, TITLE)
+    buffer = io.BytesIO()
+    file_path = str(tmp_path / "report.docx")
+
+    WRITERS["docx"].write(document, {}, buffer)
+    WRITERS["docx"].write(document, {}, file_path)
+
+    buffer.seek(0)
+    assert _paragraphs(buffer) == _paragraphs(file_path)
+    assert _paragraphs(file_path) == [
+        ("Weekly Update Header", "Weekly Update: May 20 - May 26"),
+        ("Weekly Update Header", "Bookings"),
+        ("List Bullet", "Booked this week: $1.2M"),
+        ("List Bullet 2", "Opp 1 - $400.0k"),
+        ("Weekly Update Sub Heading", "Pipeline"),
+        ("Normal", "Pipeline is on track"),
+    ]
+
+
+def _written(name: str, values: dict | None = None) -> str:
+    output = io.StringIO()
+    WRITERS[name].write(parse_report(REPORT, TITLE), values or {}, output)
+    return output.getvalue()
+
+
+def test_parse_report_nests_bullets_and_headings():
+    document = parse_report(REPORT, TITLE)
+
+    assert document.text == TITLE
+    assert [(block.kind, block.level, block.text) for block in document.walk()] == [
+        (HEADING, 1, "Bookings"),
+        (BULLET, 1, "Booked this week: $1.2M"),
+        (BULLET, 2, "Opp 1 - $400.0k"),
+        (HEADING, 2, "Pipeline"),
+        (PARAGRAPH, 0, "Pipeline is on track"),
+    ]
+    bookings = document.children[0]
+    assert [block.text for block in bookings.children] == ["Booked this week: $1.2M", "Pipeline"]
+    assert bookings.children[0].children[0].marker() == ">>"
+
+
+def test_markdown_writer():
+    assert _written("md") == (
+        "# Weekly Update: May 20 - May 26\n"
+        "\n"
+        "## Bookings\n"
+        "- Booked this week: $1.2M\n"
+        "  - Opp 1 - $400.0k\n"
+        "### Pipeline\n"
+        "Pipeline is on track\n"
+    )
+
+
+def test_html_writer():
+    assert _written("html").splitlines() == [
+        "<div>",
+        "<h1>Weekly Update: May 20 - May 26</h1>",
+        "<h2>Bookings</h2>",
+        "<ul>",
+        "<li>Booked this week: $1.2M",
+        "<ul>",
+        "<li>Opp 1 - $400.0k",
+        "</li>",
+        "</ul>",
+        "</li>",
+        "</ul>",
+        "<h3>Pipeline</h3>",
+        "<p>Pipeline is on track</p>",
+        "</div>",
+    ]
+
+
+def test_html_writer_escapes_text():
+    output = io.StringIO()
+    WRITERS["html"].write(parse_report("> R&D <beta>\n", "Q2 & Q3"), {}, output)
+
+    assert "<h1>Weekly Update: Q2 &amp; Q3</h1>" in output.getvalue()
+    assert "<li>R&amp;D &lt;beta&gt;" in output.getvalue()
+
+
+def test_json_writer_writes_the_values():
+    values = {"cw_booked_dm": "$1.2M", "cq_number": 2, "mgmt_call": Decimal("2000000")}
+
+    assert json.loads(_written("json", values)) == {
+        "title": TITLE,
+        "values": {"cq_number": 2, "cw_booked_dm": "$1.2M", "mgmt_call": "2000000"},
+    }
+
+
+def test_write_outputs_writes_every_format(tmp_path):
+    outputs = output_paths(["md", "html", "json"], str(tmp_path / "report"))
+
+    write_outputs(parse_report(REPORT, TITLE), {}, outputs)
+
+    assert outputs == {
+        name: str(tmp_path / "report.{}".format(name)) for name in ["md", "html", "json"]
+    }
+    with open(outputs["md"], encoding="utf-8") as markdown_file:
+        assert markdown_file.read() == _written("md")
+
+
+def test_unknown_output_format_raises():
+    with pytest.raises(ValueError, match="Unknown output format pdf"):
+        output_paths(["md", "pdf"], "report")